@@ -0,0 +1,76 @@
+# features/aggregation.py
+import numpy as np
+
+# Vectorised aggregation shared by the Historical tab's charts, the monthly rollups and the
+# DailySeries windows. Everything works on datetime64[D] date arrays and float arrays; there
+# is no per-day Python loop, so 30 years of daily data aggregate in about a millisecond.
+
+
+def month_buckets(dates):
+    """
+    Splits date-sorted days into calendar-month buckets.
+
+    Returns:
+        tuple: (months as datetime64[M] (one per bucket), start index of each bucket)
+    """
+    months = dates.astype("datetime64[M]")
+    if not len(months):
+        return months, np.empty(0, dtype=np.intp)
+    starts = np.concatenate(([0], np.flatnonzero(months[1:] != months[:-1]) + 1))
+    return months[starts], starts
+
+
+def monthly_aggregates(dates, columns):
+    """
+    Per-month count, sum, min and max of each column (NaN values are ignored).
+
+    Args:
+        dates (ndarray): datetime64[D] days in ascending order.
+        columns (dict): name -> float array aligned with dates.
+
+    Returns:
+        tuple: (months as datetime64[M], {name: {"count", "sum", "min", "max"} arrays})
+    """
+    months, starts = month_buckets(dates)
+    result = {}
+    for name, values in columns.items():
+        values = np.asarray(values, dtype=np.float64)
+        present = ~np.isnan(values)
+        if not len(starts):
+            empty = np.empty(0)
+            result[name] = {"count": empty.astype(np.int64), "sum": empty, "min": empty, "max": empty}
+            continue
+        result[name] = {
+            "count": np.add.reduceat(present.astype(np.int64), starts),
+            "sum": np.add.reduceat(np.where(present, values, 0.0), starts),
+            "min": np.fmin.reduceat(values, starts),
+            "max": np.fmax.reduceat(values, starts),
+        }
+    return months, result
+
+
+def monthly_means(dates, values):
+    """Returns (months as datetime64[M], mean per month) for one column, skipping empty months."""
+    months, aggregates = monthly_aggregates(dates, {"value": values})
+    stats = aggregates["value"]
+    has_data = stats["count"] > 0
+    return months[has_data], stats["sum"][has_data] / stats["count"][has_data]
+
+
+def window_slice(dates, start_date=None, end_date=None):
+    """Index slice of the days between start_date and end_date inclusive, for date-sorted arrays."""
+    start = 0 if start_date is None else int(np.searchsorted(dates, np.datetime64(start_date, "D"), side="left"))
+    stop = len(dates) if end_date is None else int(np.searchsorted(dates, np.datetime64(end_date, "D"), side="right"))
+    return slice(start, stop)
+
+
+def trailing_window_slice(dates, days):
+    """Index slice of the last `days` calendar days up to the latest day, for date-sorted arrays."""
+    if not len(dates):
+        return slice(0, 0)
+    return window_slice(dates, dates[-1] - np.timedelta64(days - 1, "D"), None)
+
+
+def format_dates(dates, unit="D"):
+    """ISO labels for datetime64 values in one call ("2024-07-01", or "2024-07" with unit="M")."""
+    return np.datetime_as_string(np.asarray(dates).astype(f"datetime64[{unit}]"), unit=unit)
@@ -1,68 +1,148 @@
 import requests
-from tkinter import messagebox
+from features.background import show_error
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date, timedelta
+
+from features.http_client import get_json
+from features.config import OWM_MAX_FORECAST_DAYS, OPEN_METEO_BATCH_SIZE, SHARD_MAX_WORKERS, SHARD_MAX_RETRIES
+from features.forecast_cache import get_cached_forecast, store_forecast
+
+class ShardFetchError(IOError):
+    """A shard of a sharded history fetch still failed after its retries."""
+
+    def __init__(self, shard_start, shard_end, cause):
+        super().__init__(f"shard {shard_start} to {shard_end} failed: {cause}")
+        self.shard_start = shard_start
+        self.shard_end = shard_end
+
+class SingleFlight:
+    """
+    Request coalescing: concurrent callers asking for the same key share one
+    in-flight call and its result (or exception) instead of each issuing their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> {"event", "result", "error"}
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"event": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = func(*args, **kwargs)
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["event"].set()
+        return call["result"]
+
+
+_request_flight = SingleFlight()
+
+
+def _request_key(url, params):
+    frozen = []
+    for name, value in sorted((params or {}).items()):
+        if isinstance(value, (list, tuple)):
+            value = tuple(value)
+        frozen.append((name, value))
+    return url, tuple(frozen)
+
+
+def get_json_shared(url, params=None):
+    """get_json with duplicate in-flight requests for the same (endpoint, params) coalesced."""
+    return _request_flight.do(_request_key(url, params), get_json, url, params=params)
+
+
+OPEN_METEO_ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+OPEN_METEO_DAILY_FIELDS = [
+    "weather_code", "temperature_2m_max", "temperature_2m_min",
+    "precipitation_sum", "wind_speed_10m_max", "sunrise", "sunset"
+]
 
 def fetch_owm_forecast(city_info):
     """
     Fetches 14-day weather forecast data from OpenWeatherMap's Daily Forecast API using lat/lon.
+    Always requests the maximum number of days; callers slice the 'list' locally.
+    Responses are served from the on-disk forecast cache while they are fresh.
     """
+    lat = city_info["lat"]
+    lon = city_info["lon"]
+    units = "imperial"
+    cnt = OWM_MAX_FORECAST_DAYS
+
+    cached = get_cached_forecast(lat, lon, units, cnt)
+    if cached is not None:
+        return cached
+
     api_key = os.getenv("OPENWEATHER_API_KEY")
     if not api_key:
-        messagebox.showerror("API Key Error", "OpenWeather API key not found. Check your .env file.")
+        show_error("API Key Error", "OpenWeather API key not found. Check your .env file.")
         return None
 
-    lat = city_info["lat"]
-    lon = city_info["lon"]
-
     # URL for the 16-Day/Daily Forecast API
     url = "http://api.openweathermap.org/data/2.5/forecast/daily"
     params = {
         "lat": lat,
         "lon": lon,
         "appid": api_key,
-        "units": "imperial",
-        "cnt": 14  # Number of days to return (max 16)
+        "units": units,
+        "cnt": cnt  # Number of days to return (max 16)
     }
 
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = get_json_shared(url, params=params)
 
         # Check for API-specific error code
         if data.get("cod") != "200":
             message = data.get('message', 'Unknown error')
-            messagebox.showerror("Forecast Error", f"Forecast not found. API response: {message}")
+            show_error("Forecast Error", f"Forecast not found. API response: {message}")
             return None
         
         # Check if forecast list is present
         if "list" not in data or not data["list"]:
-            messagebox.showerror("Forecast Error", "No forecast data found in the API response.")
+            show_error("Forecast Error", "No forecast data found in the API response.")
             return None
-            
+
+        store_forecast(lat, lon, units, cnt, data)
         return data
     except requests.exceptions.RequestException as e:
-        messagebox.showerror("Network Error", f"Could not connect to OpenWeatherMap API: {e}")
+        show_error("Network Error", f"Could not connect to OpenWeatherMap API: {e}")
         return None
     except Exception as e:
-        messagebox.showerror("Error", f"An unexpected error occurred while fetching forecast: {e}")
+        show_error("Error", f"An unexpected error occurred while fetching forecast: {e}")
         return None
 
 
-def fetch_historical_daily_data(lat, lon, timezone, start_date_str, end_date_str):
+def fetch_historical_daily_data(lat, lon, timezone, start_date_str, end_date_str, show_errors=True):
     """
     Fetches ONLY DAILY historical weather data for a given location and date range
     from Open-Meteo.com.
+    With show_errors=False failures are only printed (used by background warm-up).
     """
-    base_url = "https://archive-api.open-meteo.com/v1/archive"
+    report_error = show_error if show_errors else (lambda title, message: print(f"{title}: {message}"))
+    base_url = OPEN_METEO_ARCHIVE_URL
 
     params = {
         "latitude": lat,
         "longitude": lon,
-        "daily": [
-            "weather_code", "temperature_2m_max", "temperature_2m_min",
-            "precipitation_sum", "wind_speed_10m_max", "sunrise", "sunset"
-        ],
+        "daily": OPEN_METEO_DAILY_FIELDS,
         "start_date": start_date_str,
         "end_date": end_date_str,
         "timezone": timezone,
@@ -72,25 +152,172 @@ def fetch_historical_daily_data(lat, lon, timezone, start_date_str, end_date_str
     }
 
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = get_json_shared(base_url, params=params)
         return data
     except requests.exceptions.RequestException as e:
-        messagebox.showerror("Network Error", f"Could not connect to Open-Meteo API: {e}")
+        report_error("Network Error", f"Could not connect to Open-Meteo API: {e}")
         return None
     except KeyError as e:
-        messagebox.showerror("Data Error", f"Unexpected data format from Open-Meteo API (missing key: {e}).")
+        report_error("Data Error", f"Unexpected data format from Open-Meteo API (missing key: {e}).")
         return None
     except Exception as e:
-        messagebox.showerror("Error", f"An unexpected error occurred while fetching historical data: {e}")
+        report_error("Error", f"An unexpected error occurred while fetching historical data: {e}")
         return None
 
+
+def split_date_range_by_year(start_date_str, end_date_str):
+    """
+    Splits an inclusive date range into calendar-year windows.
+
+    Returns:
+        list: (window_start_str, window_end_str) tuples in chronological order.
+    """
+    start = date.fromisoformat(start_date_str)
+    end = date.fromisoformat(end_date_str)
+    windows = []
+    while start <= end:
+        window_end = min(date(start.year, 12, 31), end)
+        windows.append((start.isoformat(), window_end.isoformat()))
+        start = window_end + timedelta(days=1)
+    return windows
+
+
+def fetch_historical_daily_data_sharded(lat, lon, timezone, start_date_str, end_date_str,
+                                        max_workers=SHARD_MAX_WORKERS, max_shard_retries=SHARD_MAX_RETRIES):
+    """
+    Fetches a long DAILY history (e.g. a 30-year climatology) from Open-Meteo as year-sized shards.
+
+    Shards are fetched concurrently (at most max_workers at once) and a failed shard is retried
+    on its own. This is a generator: each shard's payload is yielded in chronological order as
+    soon as it and every earlier shard are available, so callers can append it to the history
+    store and drop it instead of holding the whole range in memory.
+
+    If a shard still fails after its retries, every shard before it has already been yielded
+    (a consistent prefix of the range) and ShardFetchError is raised, so callers can tell a
+    partial fetch from a complete one. Later shards are discarded: they could not be stored
+    without leaving a hole in the history.
+
+    Yields:
+        tuple: (shard_start_str, shard_end_str, payload)
+
+    Raises:
+        ShardFetchError: A shard failed after max_shard_retries retries.
+    """
+    windows = split_date_range_by_year(start_date_str, end_date_str)
+    base_params = {
+        "latitude": lat,
+        "longitude": lon,
+        "daily": OPEN_METEO_DAILY_FIELDS,
+        "timezone": timezone,
+        "temperature_unit": "fahrenheit",
+        "wind_speed_unit": "mph",
+        "precipitation_unit": "inch"
+    }
+
+    def fetch_shard(window_start, window_end):
+        params = dict(base_params, start_date=window_start, end_date=window_end)
+        return get_json_shared(OPEN_METEO_ARCHIVE_URL, params=params)
+
+    next_to_submit = 0
+    next_to_yield = 0
+    attempts = [0] * len(windows)
+    completed = {}   # shard index -> payload, waiting for earlier shards
+    running = {}     # future -> shard index
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather-shard") as executor:
+        while next_to_yield < len(windows):
+            # Keep a bounded window of shards in flight ahead of the one being yielded
+            while next_to_submit < len(windows) and len(running) + len(completed) < max_workers * 2:
+                running[executor.submit(fetch_shard, *windows[next_to_submit])] = next_to_submit
+                next_to_submit += 1
+
+            if running:
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = running.pop(future)
+                    try:
+                        payload = future.result()
+                        if not payload or 'daily' not in payload:
+                            raise ValueError("response has no daily data")
+                        completed[index] = payload
+                    except Exception as e:
+                        attempts[index] += 1
+                        if attempts[index] > max_shard_retries:
+                            print(f"Giving up on shard {windows[index][0]} to {windows[index][1]}: {e}")
+                            for pending in running:
+                                pending.cancel()
+                            # Hand over the shards that are complete before the failed one first
+                            while next_to_yield in completed:
+                                payload = completed.pop(next_to_yield)
+                                yield windows[next_to_yield][0], windows[next_to_yield][1], payload
+                                next_to_yield += 1
+                            raise ShardFetchError(windows[index][0], windows[index][1], e)
+                        print(f"Retrying shard {windows[index][0]} to {windows[index][1]} after error: {e}")
+                        running[executor.submit(fetch_shard, *windows[index])] = index
+
+            while next_to_yield in completed:
+                payload = completed.pop(next_to_yield)
+                yield windows[next_to_yield][0], windows[next_to_yield][1], payload
+                next_to_yield += 1
+
+
+def fetch_historical_daily_data_batch(city_entries, start_date_str, end_date_str, batch_size=OPEN_METEO_BATCH_SIZE):
+    """
+    Fetches DAILY historical weather data for many locations with as few requests as possible.
+    Open-Meteo accepts comma-separated latitude/longitude/timezone lists and answers with one
+    result object per location, in request order.
+
+    Args:
+        city_entries (iterable): (state_name, city_info) pairs, where city_info is a STATE_CITY_DATA entry.
+        start_date_str (str): First day to fetch (YYYY-MM-DD).
+        end_date_str (str): Last day to fetch (YYYY-MM-DD).
+        batch_size (int): Maximum number of locations per request.
+
+    Returns:
+        dict: (state_name, city_name) -> daily payload in the same shape as fetch_historical_daily_data.
+              Locations whose batch failed are left out.
+    """
+    city_entries = list(city_entries)
+    results = {}
+
+    for batch_start in range(0, len(city_entries), batch_size):
+        batch = city_entries[batch_start:batch_start + batch_size]
+        params = {
+            "latitude": ",".join(str(info["lat"]) for _, info in batch),
+            "longitude": ",".join(str(info["lon"]) for _, info in batch),
+            "timezone": ",".join(info["timezone"] for _, info in batch),
+            "daily": ",".join(OPEN_METEO_DAILY_FIELDS),
+            "start_date": start_date_str,
+            "end_date": end_date_str,
+            "temperature_unit": "fahrenheit",
+            "wind_speed_unit": "mph",
+            "precipitation_unit": "inch"
+        }
+
+        try:
+            data = get_json_shared(OPEN_METEO_ARCHIVE_URL, params=params)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            names = ", ".join(info["name"] for _, info in batch)
+            print(f"Error fetching batched historical data for {names}: {e}")
+            continue
+
+        # A single location comes back as an object, several as a list
+        payloads = data if isinstance(data, list) else [data]
+        if len(payloads) != len(batch):
+            print(f"Warning: Open-Meteo returned {len(payloads)} results for a batch of {len(batch)} locations.")
+
+        for (state_name, city_info), payload in zip(batch, payloads):
+            if payload and 'daily' in payload:
+                results[(state_name, city_info["name"])] = payload
+
+    return results
+
+
 def fetch_historical_forecast_data(latitude, longitude, start_date, end_date):
     """
     Fetches historical forecast data from the Open-Meteo API.
     """
-    base_url = "https://archive-api.open-meteo.com/v1/archive"
+    base_url = OPEN_METEO_ARCHIVE_URL
     params = {
         'latitude': latitude,
         'longitude': longitude,
@@ -104,9 +331,7 @@ def fetch_historical_forecast_data(latitude, longitude, start_date, end_date):
     }
 
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
-        data = response.json()
+        data = get_json_shared(base_url, params=params)  # Raises HTTPError for bad responses (4xx or 5xx)
         return data
     except requests.exceptions.RequestException as e:
         print(f"Error fetching historical forecast data: {e}")
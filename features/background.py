@@ -0,0 +1,158 @@
+# features/background.py
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+
+# Messages raised from worker threads are queued here and shown by the
+# Tk main thread the next time a BackgroundRunner polls its queue.
+_ui_messages = queue.Queue()
+
+
+def _show_message(kind, title, message):
+    if threading.current_thread() is threading.main_thread():
+        getattr(messagebox, kind)(title, message)
+    else:
+        print(f"{title}: {message}")
+        _ui_messages.put((kind, title, message))
+
+
+def show_error(title, message):
+    """Thread-safe messagebox.showerror: deferred to the Tk thread when called from a worker."""
+    _show_message("showerror", title, message)
+
+
+def show_warning(title, message):
+    """Thread-safe messagebox.showwarning: deferred to the Tk thread when called from a worker."""
+    _show_message("showwarning", title, message)
+
+
+class TaskHandle:
+    """Handed to a background function so it can report progress and check for cancellation."""
+
+    def __init__(self, runner, key, generation):
+        self._runner = runner
+        self.key = key
+        self.generation = generation
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def report(self, status_text):
+        """Posts a progress message; it is delivered to on_progress on the Tk thread."""
+        if not self.cancelled:
+            self._runner._results.put(("progress", self, status_text))
+
+
+class BackgroundRunner:
+    """
+    Runs blocking work (network calls, CSV writes) on a thread pool and hands the
+    results back to the Tk main thread through a queue polled with after().
+
+    Tasks are submitted under a key, e.g. "forecast". Submitting a new task under the
+    same key cancels the previous one; results from stale tasks are dropped.
+    """
+
+    def __init__(self, widget, max_workers=2, poll_ms=100):
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather-bg")
+        self._results = queue.Queue()
+        self._current = {}  # key -> (TaskHandle, callbacks)
+        self._polling = False
+        self._closed = False
+
+    def submit(self, key, func, *args, on_done=None, on_error=None, on_progress=None, **kwargs):
+        """
+        Runs func(task, *args, **kwargs) in the background.
+
+        Callbacks are called on the Tk thread:
+            on_done(result), on_error(exception), on_progress(status_text)
+
+        Returns:
+            TaskHandle: The handle of the submitted task.
+        """
+        if self._closed:
+            return None
+        previous = self._current.get(key)
+        generation = previous[0].generation + 1 if previous else 1
+        if previous:
+            previous[0].cancel()
+
+        task = TaskHandle(self, key, generation)
+        self._current[key] = (task, (on_done, on_error, on_progress))
+
+        def run():
+            try:
+                result = func(task, *args, **kwargs)
+            except Exception as e:
+                self._results.put(("error", task, e))
+            else:
+                self._results.put(("done", task, result))
+
+        self._executor.submit(run)
+        self._ensure_polling()
+        return task
+
+    def cancel(self, key):
+        """Cancels the task running under key; its result will be discarded."""
+        current = self._current.pop(key, None)
+        if current:
+            current[0].cancel()
+
+    def is_running(self, key):
+        return key in self._current
+
+    def shutdown(self):
+        self._closed = True
+        for task, _ in self._current.values():
+            task.cancel()
+        self._current.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _ensure_polling(self):
+        if not self._polling and not self._closed:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        if self._closed:
+            return
+
+        while True:
+            try:
+                kind, title, message = _ui_messages.get_nowait()
+            except queue.Empty:
+                break
+            getattr(messagebox, kind)(title, message)
+
+        while True:
+            try:
+                event, task, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            current = self._current.get(task.key)
+            if current is None or current[0] is not task or task.cancelled:
+                continue  # Stale or cancelled task
+            on_done, on_error, on_progress = current[1]
+            if event == "progress":
+                if on_progress:
+                    on_progress(payload)
+                continue
+            del self._current[task.key]
+            if event == "done" and on_done:
+                on_done(payload)
+            elif event == "error":
+                if on_error:
+                    on_error(payload)
+                else:
+                    messagebox.showerror("Error", f"An unexpected error occurred: {payload}")
+
+        if self._current:
+            self._ensure_polling()
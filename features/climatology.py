@@ -0,0 +1,259 @@
+# features/climatology.py
+import csv
+import os
+import warnings
+
+import numpy as np
+
+from features import file_lock, history_index
+from features.daily_series import DailySeries
+
+# Day-of-year normals and percentile bands per city, kept next to the history CSV
+# (<file>.climate.npz). Every stored day goes into a years x 366 grid indexed by calendar day
+# (Feb 29 has its own slot, so Mar 1 is always slot 60). The statistics for a calendar day use
+# all years at once, over a window of WINDOW_DAYS either side of it to smooth short histories.
+# The cache records the CSV checksum it covers; appends update only the grid cells they touch
+# and the calendar days whose window includes them.
+CLIMATOLOGY_VERSION = 1
+FIELDS = ("avg_temp", "max_temp", "min_temp", "precip")
+QUANTILE_LEVELS = np.arange(0, 101, 5)   # Percentiles stored per calendar day (p10/p50/p90 included)
+WINDOW_DAYS = 7
+MIN_SAMPLES = 5                           # Fewer values than this leave the calendar day empty (NaN)
+SLOTS = 366
+_WINDOW_OFFSETS = np.arange(-WINDOW_DAYS, WINDOW_DAYS + 1)
+# Cumulative days before each month in a leap year
+_LEAP_MONTH_STARTS = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335])
+
+
+def climatology_path_for_csv(csv_filepath):
+    return os.path.splitext(csv_filepath)[0] + ".climate.npz"
+
+
+def day_of_year_slots(dates):
+    """Calendar-day slot (0-365, Feb 29 = 59) of each datetime64 date."""
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    months = dates.astype("datetime64[M]")
+    month_index = months.astype(np.int64) % 12
+    day_of_month = (dates - months.astype("datetime64[D]")).astype(np.int64)
+    return _LEAP_MONTH_STARTS[month_index] + day_of_month
+
+
+def _years(dates):
+    return np.asarray(dates, dtype="datetime64[D]").astype("datetime64[Y]").astype(np.int64) + 1970
+
+
+def _series_columns(series):
+    return {"avg_temp": series.avg_temp, "max_temp": series.max_temp,
+            "min_temp": series.min_temp, "precip": series.precip}
+
+
+def _fill_grid(grid, first_year, series):
+    """Writes the series' days into grid (fields x years x slots), growing it for new years."""
+    if not len(series):
+        return grid, first_year
+    years = _years(series.dates)
+    if first_year is None:
+        first_year = int(years.min())
+    if years.min() < first_year:
+        pad = first_year - int(years.min())
+        grid = np.concatenate([np.full((len(FIELDS), pad, SLOTS), np.nan, dtype=np.float32), grid], axis=1)
+        first_year -= pad
+    rows_needed = int(years.max()) - first_year + 1
+    if rows_needed > grid.shape[1]:
+        extra = np.full((len(FIELDS), rows_needed - grid.shape[1], SLOTS), np.nan, dtype=np.float32)
+        grid = np.concatenate([grid, extra], axis=1)
+    year_rows = years - first_year
+    slots = day_of_year_slots(series.dates)
+    for i, values in enumerate(_series_columns(series).values()):
+        grid[i, year_rows, slots] = values
+    return grid, first_year
+
+
+def _window_statistics(grid, slots):
+    """
+    Mean, sample count and QUANTILE_LEVELS percentiles for the given calendar-day slots,
+    over every year and the +/- WINDOW_DAYS window at once. The window wraps around the end
+    of the year within the same grid row.
+
+    Returns:
+        tuple: (mean (fields x slots), count (fields x slots), quantiles (fields x levels x slots))
+    """
+    columns = (slots[:, None] + _WINDOW_OFFSETS) % SLOTS                   # slots x window
+    samples = grid[:, :, columns]                                          # fields x years x slots x window
+    samples = samples.transpose(0, 2, 1, 3).reshape(len(FIELDS), len(slots), -1)
+    count = (~np.isnan(samples)).sum(axis=2)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN calendar days
+        mean = np.nanmean(samples, axis=2)
+    quantiles = _sorted_quantiles(np.sort(samples, axis=2), count)
+    sparse = count < MIN_SAMPLES
+    mean[sparse] = np.nan
+    quantiles = np.where(sparse[:, None, :], np.nan, quantiles)
+    return mean.astype(np.float32), count.astype(np.int32), quantiles.astype(np.float32)
+
+
+def _sorted_quantiles(ordered, count):
+    """
+    QUANTILE_LEVELS percentiles (linear interpolation, as np.percentile) of samples sorted along
+    the last axis with NaNs at the end; count is the number of non-NaN values in each row.
+    """
+    if not ordered.shape[-1]:
+        return np.full(ordered.shape[:-1] + (len(QUANTILE_LEVELS),), np.nan).swapaxes(-1, -2)
+    positions = (np.maximum(count, 1) - 1)[..., None] * (QUANTILE_LEVELS / 100.0)   # ... x levels
+    below = np.floor(positions).astype(np.intp)
+    above = np.minimum(below + 1, np.maximum(count, 1)[..., None] - 1)
+    fraction = positions - below
+    low = np.take_along_axis(ordered, below, axis=-1)
+    high = np.take_along_axis(ordered, above, axis=-1)
+    quantiles = low + (high - low) * fraction
+    return np.moveaxis(quantiles, -1, -2)  # ... x levels x slots
+
+
+class Climatology:
+    """
+    A city's day-of-year normals: for each field in FIELDS and each calendar-day slot, the
+    mean, the number of samples and the QUANTILE_LEVELS percentiles. Looking up a date is an
+    array index (see day_of_year_slots), so no history is scanned.
+    """
+
+    __slots__ = ("first_year", "grid", "mean", "count", "quantiles")
+
+    def __init__(self, first_year, grid, mean, count, quantiles):
+        self.first_year = first_year
+        self.grid = grid
+        self.mean = mean
+        self.count = count
+        self.quantiles = quantiles
+
+    @classmethod
+    def from_series(cls, series):
+        grid = np.full((len(FIELDS), 0, SLOTS), np.nan, dtype=np.float32)
+        grid, first_year = _fill_grid(grid, None, series)
+        mean, count, quantiles = _window_statistics(grid, np.arange(SLOTS))
+        return cls(first_year, grid, mean, count, quantiles)
+
+    def update(self, series):
+        """Adds appended days and recomputes only the calendar days whose window they fall in."""
+        if not len(series):
+            return self
+        self.grid, self.first_year = _fill_grid(self.grid, self.first_year, series)
+        touched = np.unique((day_of_year_slots(series.dates)[:, None] + _WINDOW_OFFSETS) % SLOTS)
+        mean, count, quantiles = _window_statistics(self.grid, touched)
+        self.mean[:, touched] = mean
+        self.count[:, touched] = count
+        self.quantiles[:, :, touched] = quantiles
+        return self
+
+    def _field(self, field):
+        return FIELDS.index(field)
+
+    def percentile(self, field, level):
+        """The `level` percentile of field for every calendar-day slot (level must be in QUANTILE_LEVELS)."""
+        return self.quantiles[self._field(field), int(np.searchsorted(QUANTILE_LEVELS, level))]
+
+    def band(self, field, dates):
+        """
+        Normal band of field for each date.
+
+        Returns:
+            dict: {"mean", "p10", "p50", "p90"} arrays aligned with dates (NaN where history is too short)
+        """
+        slots = day_of_year_slots(dates)
+        i = self._field(field)
+        band = {"mean": self.mean[i, slots]}
+        for level in (10, 50, 90):
+            band[f"p{level}"] = self.percentile(field, level)[slots]
+        return band
+
+    def departure(self, field, dates, values):
+        """Difference between each value and its calendar day's mean (NaN where history is too short)."""
+        return np.asarray(values, dtype=np.float64) - self.mean[self._field(field), day_of_year_slots(dates)]
+
+    def percentile_rank(self, field, dates, values):
+        """Percentile (0-100) of each value within its calendar day's distribution, NaN where unknown."""
+        slots = day_of_year_slots(dates)
+        table = self.quantiles[self._field(field)][:, slots]               # levels x dates
+        values = np.asarray(values, dtype=np.float64)
+        ranks = np.full(len(values), np.nan)
+        for j in range(len(values)):
+            if not np.isnan(table[:, j]).any() and not np.isnan(values[j]):
+                ranks[j] = _rank_in_quantiles(table[:, j], values[j])
+        return ranks
+
+
+def _rank_in_quantiles(quantiles, value):
+    below = int(np.searchsorted(quantiles, value, side="left"))
+    above = int(np.searchsorted(quantiles, value, side="right"))
+    if below < above:
+        # value equals one or more stored percentiles (e.g. many dry days): middle of the tie
+        return float(QUANTILE_LEVELS[below] + QUANTILE_LEVELS[above - 1]) / 2
+    if below == 0:
+        return 0.0
+    if below == len(quantiles):
+        return 100.0
+    low, high = quantiles[below - 1], quantiles[below]
+    return float(QUANTILE_LEVELS[below - 1] + (QUANTILE_LEVELS[below] - QUANTILE_LEVELS[below - 1]) * (value - low) / (high - low))
+
+
+def _load(csv_filepath):
+    try:
+        with np.load(climatology_path_for_csv(csv_filepath)) as data:
+            if int(data["version"]) != CLIMATOLOGY_VERSION:
+                return None, None
+            first_year = int(data["first_year"]) if data["grid"].shape[1] else None
+            climatology = Climatology(first_year, data["grid"], data["mean"],
+                                      data["count"], data["quantiles"])
+            return climatology, int(data["crc32"])
+    except (OSError, ValueError, KeyError):
+        return None, None
+
+
+def _save(csv_filepath, climatology, checksum):
+    path = climatology_path_for_csv(csv_filepath)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, version=CLIMATOLOGY_VERSION, crc32=-1 if checksum is None else checksum,
+                     first_year=climatology.first_year or 0, grid=climatology.grid, mean=climatology.mean,
+                     count=climatology.count, quantiles=climatology.quantiles)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: Could not write climatology for {csv_filepath}: {e}")
+
+
+def rebuild_climatology(csv_filepath):
+    """Recomputes a CSV's climatology from the whole file and saves it."""
+    with file_lock.locked(csv_filepath):
+        index = history_index.get_index(csv_filepath)
+        with open(csv_filepath, 'r', newline='', encoding='utf-8') as f:
+            climatology = Climatology.from_series(DailySeries.from_rows(csv.DictReader(f)))
+    _save(csv_filepath, climatology, index["crc32"] if index else None)
+    return climatology
+
+
+def note_append(csv_filepath, rows, checksum_before):
+    """
+    Adds appended rows to the cached climatology when it covered the file as it was before the
+    append (checksum_before); otherwise the climatology is rebuilt from the file.
+    """
+    climatology, checksum = _load(csv_filepath)
+    index = history_index.get_index(csv_filepath)
+    if climatology is None or checksum_before is None or checksum != checksum_before or index is None:
+        return rebuild_climatology(csv_filepath)
+    climatology.update(DailySeries.from_rows(rows))
+    _save(csv_filepath, climatology, index["crc32"])
+    return climatology
+
+
+def get_climatology(csv_filepath):
+    """
+    Returns a CSV's Climatology, rebuilding it when the CSV's checksum no longer matches.
+    Returns None when the CSV does not exist.
+    """
+    index = history_index.get_index(csv_filepath)
+    if index is None:
+        return None
+    climatology, checksum = _load(csv_filepath)
+    if climatology is not None and checksum == index["crc32"]:
+        return climatology
+    return rebuild_climatology(csv_filepath)
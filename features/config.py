@@ -1,7 +1,64 @@
 # features/config.py
+import os
 from datetime import datetime, timedelta
 import matplotlib.font_manager as fm
 
+# OpenWeatherMap daily forecast: the API returns at most 16 days. We always request
+# the maximum and slice locally so changing the day selector never needs a new request.
+OWM_MAX_FORECAST_DAYS = 16
+
+# On-disk forecast response cache (see features/forecast_cache.py)
+FORECAST_CACHE_DIR = os.path.join("cache", "forecast")
+FORECAST_CACHE_TTL_SECONDS = int(os.getenv("FORECAST_CACHE_TTL_SECONDS", 30 * 60))
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_CACHE_MAX_ENTRIES", 64))
+
+# Team data: member CSVs in GroupData/ are normalised into one typed binary cache
+# (see features/team_ingest.py); team_weather_data.csv is the hand-merged legacy file.
+TEAM_DATA_DIR = "GroupData"
+TEAM_MERGED_CSV = "team_weather_data.csv"
+TEAM_CACHE_DIR = os.path.join("cache", "team")
+
+# Storage backend for city histories: "csv" (one file per city in historical_data/)
+# or "sqlite" (a single indexed database, see features/history_db.py).
+HISTORY_BACKEND = os.getenv("HISTORY_BACKEND", "csv").lower()
+HISTORY_DB_PATH = os.path.join("historical_data", "history.sqlite3")
+
+# Typed binary copy of every history CSV, kept in step with each save, that the charts read
+# instead of parsing the CSV: "columnar" (one .npy file per column, see features/history_store.py),
+# "records" (fixed-width memory-mapped rows, see features/record_store.py) or "csv" (no copy).
+HISTORY_READ_FORMAT = os.getenv("HISTORY_READ_FORMAT", "columnar").lower()
+
+# First day of stored history. A city without history is fetched from this day, and a city
+# whose history starts later is backfilled to it (e.g. HISTORY_START_DATE=1995-01-01 in .env
+# for a 30-year climatology).
+HISTORY_START_DATE = datetime.strptime(os.getenv("HISTORY_START_DATE", "2024-07-01"), "%Y-%m-%d").date()
+
+# Minimum time between two delta syncs of the same city. The archive publishes new
+# days with a lag, so checking more often only returns empty values.
+SYNC_MIN_INTERVAL_SECONDS = int(os.getenv("SYNC_MIN_INTERVAL_SECONDS", 60 * 60))
+
+# Optional warm-up of every city's history after startup (see features/prefetch.py).
+WARMUP_ON_STARTUP = os.getenv("WARMUP_HISTORY_ON_STARTUP", "0").lower() in ("1", "true", "yes")
+WARMUP_DELAY_MS = 3000      # Wait until the window is idle before starting
+WARMUP_MAX_WORKERS = 3      # Cities refreshed in parallel (requests are also capped globally)
+
+# Long archive downloads are split into year-sized shards fetched in parallel.
+SHARD_THRESHOLD_DAYS = 366  # Ranges longer than this use the sharded fetch
+SHARD_MAX_WORKERS = 3
+SHARD_MAX_RETRIES = 2       # Extra attempts per failed shard (on top of the HTTP-level retries)
+
+# Client-side request budgets per provider, enforced by the token buckets in
+# features/rate_limit.py. Open-Meteo's free tier allows 600 calls/minute and
+# OpenWeatherMap's free tier 60 calls/minute; stay a little under both.
+PROVIDER_RATE_LIMITS = {
+    "openweathermap": {"domains": ["openweathermap.org"], "rate_per_second": 50 / 60, "burst": 5},
+    "open-meteo": {"domains": ["open-meteo.com"], "rate_per_second": 500 / 60, "burst": 10},
+}
+
+# Open-Meteo archive accepts comma-separated coordinate lists; this is the number of
+# locations sent per batched request.
+OPEN_METEO_BATCH_SIZE = 10
+
 # Data structure for States and Cities with coordinates and timezones.
 STATE_CITY_DATA = {
     "New York": {
@@ -128,6 +185,14 @@ OM_WEATHER_CODES = {
     99: "Thunderstorm with heavy hail"
 }
 
+def iter_city_entries(state_city_data=None):
+    """Yields (state_name, city_info) pairs for every configured city."""
+    if state_city_data is None:
+        state_city_data = STATE_CITY_DATA
+    for state_name, cities in state_city_data.items():
+        for city_info in cities.values():
+            yield state_name, city_info
+
 def get_om_weather_description(code):
     """Translates Open-Meteo weather codes to human-readable descriptions."""
     return OM_WEATHER_CODES.get(code, f"Unknown ({code})")
@@ -1,49 +1,175 @@
 # features/csv_files.py
 import csv
+import io
 import os
-from tkinter import messagebox
+import json
+import time
+from features.background import show_error, show_warning
 from datetime import datetime, timedelta
-from features.config import get_om_weather_description
-from features.api import fetch_historical_forecast_data  # Import the API function
+from features.config import (get_om_weather_description, iter_city_entries, HISTORY_START_DATE, SYNC_MIN_INTERVAL_SECONDS,
+                             SHARD_THRESHOLD_DAYS, HISTORY_BACKEND, HISTORY_READ_FORMAT)
+from features import climatology, file_lock, history_db, history_index, history_store, record_store, rollups
+from features.daily_series import DailySeries
+from features.api import (fetch_historical_forecast_data, fetch_historical_daily_data, fetch_historical_daily_data_batch,
+                          fetch_historical_daily_data_sharded, ShardFetchError, SingleFlight)  # Import the API functions
 
 HISTORY_DIR = "historical_data" # Define the directory for historical CSVs
 os.makedirs(HISTORY_DIR, exist_ok=True) # Ensure directory exists
 
-def clean_data(csv_filepath):
+FIELDNAMES = [
+    "Date", "Max Temperature (°F)", "Min Temperature (°F)",
+    "Precipitation (inch)", "Max Wind Speed (mph)",
+    "Weather Description", "Sunrise (UTC)", "Sunset (UTC)"
+]
+
+# Typed copies that load_daily_series can read instead of the CSV, by HISTORY_READ_FORMAT
+_TYPED_STORES = {"columnar": history_store, "records": record_store}
+
+def history_csv_path(state_name, city_name):
+    """Returns the path of a city's history CSV (state_city_daily_weather_history.csv)."""
+    filename = f"{state_name.replace(' ', '_').lower()}_{city_name.replace(' ', '_').lower()}_daily_weather_history.csv"
+    return os.path.join(HISTORY_DIR, filename)
+
+def daily_payload_to_rows(daily):
+    """Converts the 'daily' block of an Open-Meteo response into CSV row dicts."""
+    rows = []
+    for i in range(len(daily['time'])):
+        weather_code = daily['weather_code'][i]
+        rows.append({
+            "Date": daily['time'][i],
+            "Max Temperature (°F)": daily['temperature_2m_max'][i],
+            "Min Temperature (°F)": daily['temperature_2m_min'][i],
+            "Precipitation (inch)": daily['precipitation_sum'][i],
+            "Max Wind Speed (mph)": daily['wind_speed_10m_max'][i],
+            "Weather Description": get_om_weather_description(weather_code),
+            "Sunrise (UTC)": daily['sunrise'][i],
+            "Sunset (UTC)": daily['sunset'][i]
+        })
+    return rows
+
+def _row_is_complete(row):
+    return all(value is not None and str(value).strip() != "" for value in row.values())
+
+def _rows_to_bytes(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDNAMES)
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+def _write_new_file(csv_filepath, rows):
+    """Writes a complete file to a temp path and renames it into place (atomic)."""
+    tmp_filepath = csv_filepath + ".tmp"
+    data = _rows_to_bytes(rows, header=True)
+    with open(tmp_filepath, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filepath, csv_filepath)
+    history_index.note_write(csv_filepath, 0, data)
+
+def _append_rows(csv_filepath, rows):
+    """
+    Appends rows in a single journaled write (the caller holds the file lock). If the write
+    fails part-way, or the process dies mid-write, the file goes back to its previous length,
+    so a reader never sees a half-written tail.
     """
-    Removes all rows in a CSV file after the first row containing missing data.
+    if not rows:
+        return
+    data = _rows_to_bytes(rows)
+    original_size = file_lock.journal_append(csv_filepath, data)
+    history_index.note_write(csv_filepath, original_size, data)
 
-    Args:
-        csv_filepath (str): The path to the CSV file.
+def _has_expected_header(csv_filepath):
+    try:
+        with open(csv_filepath, 'r', newline='', encoding='utf-8') as f:
+            return next(csv.reader([f.readline()]), None) == FIELDNAMES
+    except (OSError, StopIteration):
+        return False
+
+def _select_new_rows(rows, last_date):
     """
+    Validates rows as they are selected for appending: keeps rows dated after last_date and
+    stops at the first row with missing values, so only complete rows are ever stored.
 
-    rows = []
-    missing_data_found = False
+    Returns:
+        tuple: (rows to append, new last date, True if stopped at an incomplete row)
+    """
+    new_rows = []
+    for row in rows:
+        row_date = datetime.strptime(row["Date"], '%Y-%m-%d').date()
+        if last_date and row_date <= last_date:
+            continue
+        if not _row_is_complete(row):
+            return new_rows, last_date, True
+        new_rows.append(row)
+        last_date = row_date
+    return new_rows, last_date, False
+
+def _save_rows(csv_filepath, rows, last_date):
+    """
+    Single-pass save used by every CSV write path. New files are written atomically
+    (temp file + rename); existing files only get the new tail appended.
+
+    The whole read-last-date / select / append sequence runs under the file's lock, and the
+    last stored date is re-read from the index once the lock is held, so two refreshers of
+    the same city never append the same days twice. Other cities are not blocked.
 
+    Returns:
+        tuple: (number of rows written, new last date, True if stopped at an incomplete row)
+    """
+    with file_lock.locked(csv_filepath):
+        file_exists = os.path.exists(csv_filepath) and os.path.getsize(csv_filepath) > 0
+        if file_exists and not _has_expected_header(csv_filepath):
+            print(f"Warning: Header mismatch in {csv_filepath}. Overwriting file.")
+            file_exists = False
+        if file_exists:
+            last_date = _read_last_date(csv_filepath) or last_date
+        new_rows, last_date, truncated = _select_new_rows(rows, last_date if file_exists else None)
+        checksum_before = None
+        if file_exists:
+            index = history_index.get_index(csv_filepath)
+            checksum_before = index["crc32"] if index else None
+            _append_rows(csv_filepath, new_rows)
+        else:
+            _write_new_file(csv_filepath, new_rows)
+            record_store.remove_records(csv_filepath)
+            history_store.remove_columns(csv_filepath)
+        _mirror_typed_copy(csv_filepath, new_rows, checksum_before)
+        if new_rows:
+            try:
+                rollups.note_append(csv_filepath, new_rows, checksum_before)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not update monthly rollup for {csv_filepath}: {e}")
+            try:
+                climatology.note_append(csv_filepath, new_rows, checksum_before)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not update climatology for {csv_filepath}: {e}")
+    return len(new_rows), last_date, truncated
+
+def _rebuild_typed_copy(csv_filepath):
+    store = _TYPED_STORES.get(HISTORY_READ_FORMAT)
+    if store is None:
+        return
     try:
-        with open(csv_filepath, 'r', newline='', encoding='utf-8') as csvfile:
-            reader = csv.reader(csvfile)
-            header = next(reader)  # Read the header row
-            rows.append(header)
-
-            for row in reader:
-                if any(not cell.strip() for cell in row):  # Check for empty cells
-                    missing_data_found = True
-                    break  # Stop adding rows after the first row with missing data
-                else:
-                    rows.append(row)
-
-        # Write the filtered rows back to the CSV file
-        with open(csv_filepath, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerows(rows)
-
-        print(f"Cleaned data in {csv_filepath}")
-
-    except FileNotFoundError:
-        print(f"Error: File not found at {csv_filepath}")
-    except Exception as e:
-        print(f"Error cleaning data in {csv_filepath}: {e}")
+        store.build_from_csv(csv_filepath)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not rebuild the {HISTORY_READ_FORMAT} copy of {csv_filepath}: {e}")
+
+def _mirror_typed_copy(csv_filepath, new_rows, checksum_before):
+    """
+    Keeps the typed copy selected by HISTORY_READ_FORMAT (history_store columns or record_store
+    records) in step with the CSV: the new rows are appended when the copy matched the CSV
+    before this write, otherwise it is rebuilt.
+    """
+    store = _TYPED_STORES.get(HISTORY_READ_FORMAT)
+    if store is None:
+        return
+    try:
+        store.append_rows(csv_filepath, new_rows, checksum_before)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not update the {HISTORY_READ_FORMAT} copy of {csv_filepath}: {e}")
 
 def create_historical_data_csv(state_name, city_name, daily_weather_data, start_date_str, end_date_str, state_city_data):
     """
@@ -52,76 +178,35 @@ def create_historical_data_csv(state_name, city_name, daily_weather_data, start_
     Filename format: state_city_daily_weather_history.csv
     """
     if not daily_weather_data or 'daily' not in daily_weather_data:
-        messagebox.showwarning("No Data", f"No daily weather data available for {city_name} for the period {start_date_str} to {end_date_str}.")
+        show_warning("No Data", f"No daily weather data available for {city_name} for the period {start_date_str} to {end_date_str}.")
         return
 
     # MODIFIED FILENAME FORMAT
-    filename = f"{state_name.replace(' ', '_').lower()}_{city_name.replace(' ', '_').lower()}_daily_weather_history.csv"
-    output_filepath = os.path.join(HISTORY_DIR, filename)
-
-    daily = daily_weather_data['daily']
-
-    fieldnames = [
-        "Date", "Max Temperature (°F)", "Min Temperature (°F)",
-        "Precipitation (inch)", "Max Wind Speed (mph)",
-        "Weather Description", "Sunrise (UTC)", "Sunset (UTC)"
-    ]
-
-    rows_to_write = []
-    num_days = len(daily['time'])
-
-    for i in range(num_days):
-        weather_code = daily['weather_code'][i]
-        description = get_om_weather_description(weather_code)
-        
-        row = {
-            "Date": daily['time'][i],
-            "Max Temperature (°F)": daily['temperature_2m_max'][i],
-            "Min Temperature (°F)": daily['temperature_2m_min'][i],
-            "Precipitation (inch)": daily['precipitation_sum'][i],
-            "Max Wind Speed (mph)": daily['wind_speed_10m_max'][i],
-            "Weather Description": description,
-            "Sunrise (UTC)": daily['sunrise'][i],
-            "Sunset (UTC)": daily['sunset'][i]
-        }
-        rows_to_write.append(row)
+    output_filepath = history_csv_path(state_name, city_name)
+    rows_to_write = daily_payload_to_rows(daily_weather_data['daily'])
+
+    if HISTORY_BACKEND == "sqlite":
+        # The (state, city, date) primary key de-duplicates; no need to read existing dates
+        complete_rows = []
+        for row in rows_to_write:
+            if not _row_is_complete(row):
+                break
+            complete_rows.append(row)
+        history_db.upsert_rows(state_name, city_name, complete_rows)
+        _set_sync_state(output_filepath, get_high_water_mark(state_name, city_name, use_sidecar=False))
+        print(f"Upserted {len(complete_rows)} days for {city_name} ({state_name}) into the history database.")
+        return
 
     try:
-        file_exists = os.path.exists(output_filepath)
-        
-        # Read existing dates for de-duplication
-        existing_dates = set()
-        if file_exists:
-            try:
-                with open(output_filepath, 'r', newline='', encoding='utf-8') as read_f:
-                    reader = csv.DictReader(read_f)
-                    # Check if header matches to avoid reading malformed files
-                    if reader.fieldnames == fieldnames:
-                        for r in reader:
-                            existing_dates.add(r['Date'])
-                    else:
-                        print(f"Warning: Header mismatch in {output_filepath}. Overwriting file.")
-                        file_exists = False
-            except Exception as read_e:
-                print(f"Warning: Could not read existing file {output_filepath} for de-duplication: {read_e}. Appending all new data for this session.")
-                existing_dates = set()
-
-        new_rows = [row for row in rows_to_write if row['Date'] not in existing_dates]
-
-        with open(output_filepath, 'a', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            if not file_exists:
-                writer.writeheader()
-            
-            if new_rows:
-                writer.writerows(new_rows)
-                print("Success", f"Daily historical data for {city_name} ({state_name}) from {start_date_str} to {end_date_str} saved/appended to:\n{output_filepath}\nAdded {len(new_rows)} new entries.")
-            else:
-                print("Info", f"No new daily historical data to add for {city_name} ({state_name}) from {start_date_str} to {end_date_str}). File is up-to-date for this period.")
-
-        # Clean the data immediately after creating the CSV file
-        clean_data(output_filepath)
+        # One pass: find the last stored date from the file's tail, then append only the
+        # validated rows after it. Dates up to the last stored one are already on disk.
+        last_date = _read_last_date(output_filepath)
+        added, last_date, _ = _save_rows(output_filepath, rows_to_write, last_date)
+        if added:
+            print("Success", f"Daily historical data for {city_name} ({state_name}) from {start_date_str} to {end_date_str} saved/appended to:\n{output_filepath}\nAdded {added} new entries.")
+        else:
+            print("Info", f"No new daily historical data to add for {city_name} ({state_name}) from {start_date_str} to {end_date_str}). File is up-to-date for this period.")
+        _set_sync_state(output_filepath, last_date)
 
         # --- Fill in Missing Last Days ---
         # Extract latitude and longitude from city data (replace with your actual data source)
@@ -132,81 +217,34 @@ def create_historical_data_csv(state_name, city_name, daily_weather_data, start_
             latitude = city_info['lat']
             longitude = city_info['lon']
 
-            # Determine the last date in the CSV file
-            last_date_str = None
-            try:
-                with open(output_filepath, 'r', newline='', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    rows = list(reader)
-                    if rows:
-                        last_date_str = rows[-1]['Date']  # Get the date from the last row
-            except Exception as e:
-                print(f"Error reading CSV to determine last date: {e}")
-                last_date_str = None
-
             # Convert start and end dates to datetime objects for comparison
             start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
             end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
             today = datetime.now().date()
             tomorrow = today + timedelta(days=1)
 
-            if last_date_str:
-                last_date = datetime.strptime(last_date_str, '%Y-%m-%d').date()
+            if last_date:
                 next_date = last_date + timedelta(days=1)
 
-                # Fetch data for missing days (up to the specified end date or tomorrow, whichever is earlier)
+                # Fetch data for missing days (up to the specified end date or tomorrow, whichever is earlier).
+                # Days the payload already covered were incomplete upstream (archive lag), so asking
+                # for them again would only return the same empty values.
                 missing_end_date = min(end_date, tomorrow)  # Ensure we don't exceed the intended end date
-                if next_date <= missing_end_date:
+                payload_last_date = datetime.strptime(rows_to_write[-1]["Date"], '%Y-%m-%d').date() if rows_to_write else None
+                if next_date <= missing_end_date and (payload_last_date is None or next_date > payload_last_date):
                     missing_start_date_str = next_date.strftime('%Y-%m-%d')
                     missing_end_date_str = missing_end_date.strftime('%Y-%m-%d')
 
-                    # --- DIAGNOSTIC ---
-                    yesterday = today - timedelta(days=1)
-                    missing_start_date_str = yesterday.strftime('%Y-%m-%d')
-                    missing_end_date_str = yesterday.strftime('%Y-%m-%d')
-                    print(f"*** API DIAGNOSTIC ***: Requesting data for: {missing_start_date_str}")
-                    # --- END DIAGNOSTIC ---
-
                     historical_forecast_data = fetch_historical_forecast_data(latitude, longitude, missing_start_date_str, missing_end_date_str)
 
                     if historical_forecast_data and 'daily' in historical_forecast_data:
                         daily_forecast = historical_forecast_data['daily']
-                        num_missing_days = len(daily_forecast['time'])
-                        print(f"num_missing_days: {num_missing_days}")
-
-                        missing_rows_to_write = []
-                        for i in range(num_missing_days):
-                            weather_code = daily_forecast['weather_code'][i]
-                            description = get_om_weather_description(weather_code)
-
-                            missing_row = {
-                                "Date": daily_forecast['time'][i],
-                                "Max Temperature (°F)": daily_forecast['temperature_2m_max'][i],
-                                "Min Temperature (°F)": daily_forecast['temperature_2m_min'][i],
-                                "Precipitation (inch)": daily_forecast['precipitation_sum'][i],
-                                "Max Wind Speed (mph)": daily_forecast['wind_speed_10m_max'][i],
-                                "Weather Description": description,
-                                "Sunrise (UTC)": daily_forecast['sunrise'][i],
-                                "Sunset (UTC)": daily_forecast['sunset'][i]
-                            }
-                            print(f"missing_row: {missing_row}") # ADDED: Check the row data
-
-                            missing_rows_to_write.append(missing_row)
-
-                        # --- DIAGNOSTIC: Check fieldnames and data types ---
-                        print(f"fieldnames: {fieldnames}")
-                        for row in missing_rows_to_write:
-                            for key, value in row.items():
-                                print(f"Key: {key}, Value: {value}, Type: {type(value)}")
-                        # --- END DIAGNOSTIC ---
+                        missing_rows_to_write = daily_payload_to_rows(daily_forecast)
 
                         # Append the missing rows to the CSV file
-                        with open(output_filepath, 'a', newline='', encoding='utf-8') as csvfile:
-                            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                            writer.writerows(missing_rows_to_write)
-
-                        print(f"Appended {len(missing_rows_to_write)} missing days to {output_filepath}")
-                        clean_data(output_filepath) # Clean again after appending
+                        added, last_date, _ = _save_rows(output_filepath, missing_rows_to_write, last_date)
+                        print(f"Appended {added} missing days to {output_filepath}")
+                        _set_sync_state(output_filepath, last_date)
                     else:
                         print("No historical forecast data found for the missing days.")
             else:
@@ -215,6 +253,461 @@ def create_historical_data_csv(state_name, city_name, daily_weather_data, start_
             print(f"City information not found for {city_name}, {state_name}. Cannot fetch missing data.")
 
     except IOError as e:
-        messagebox.showerror("File Error", f"Could not write to file {output_filepath}: {e}")
+        show_error("File Error", f"Could not write to file {output_filepath}: {e}")
     except Exception as e:
-        messagebox.showerror("Error", f"An unexpected error occurred while saving historical data: {e}")
\ No newline at end of file
+        show_error("Error", f"An unexpected error occurred while saving historical data: {e}")
+
+
+# --- Incremental (delta) sync ---
+# Each history CSV has a small sidecar file holding its high-water mark: the last stored
+# date and when upstream was last checked. A sync only asks Open-Meteo for the days after
+# the high-water mark and appends them, so a daily refresh costs O(new days).
+
+def _sync_state_path(csv_filepath):
+    return os.path.splitext(csv_filepath)[0] + ".sync.json"
+
+def _read_date_bounds(csv_filepath):
+    """Returns (first date, last date) of a CSV from its sidecar index, or (None, None) when it has no rows."""
+    index = history_index.get_index(csv_filepath)
+    if not index or not index["rows"]:
+        return None, None
+    return (datetime.strptime(index["min_date"], '%Y-%m-%d').date(),
+            datetime.strptime(index["max_date"], '%Y-%m-%d').date())
+
+def _read_last_date(csv_filepath):
+    return _read_date_bounds(csv_filepath)[1]
+
+def _read_first_date(csv_filepath):
+    return _read_date_bounds(csv_filepath)[0]
+
+def _get_sync_state(csv_filepath):
+    try:
+        with open(_sync_state_path(csv_filepath), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _set_sync_state(csv_filepath, last_date, checked_at=None):
+    state = {
+        "last_date": last_date.isoformat() if last_date else None,
+        "checked_at": checked_at if checked_at is not None else time.time()
+    }
+    try:
+        tmp_path = _sync_state_path(csv_filepath) + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, _sync_state_path(csv_filepath))
+    except OSError as e:
+        print(f"Warning: Could not write sync state for {csv_filepath}: {e}")
+
+def get_high_water_mark(state_name, city_name, use_sidecar=True):
+    """
+    Returns the last stored date for a city, or None when there is no history yet.
+    Reads the CSV's sidecar index (use_sidecar=False rebuilds it from the file first),
+    or the database when HISTORY_BACKEND is "sqlite".
+    """
+    csv_filepath = history_csv_path(state_name, city_name)
+    if HISTORY_BACKEND == "sqlite":
+        last_date_str = history_db.get_last_date_str(state_name, city_name)
+        return datetime.strptime(last_date_str, '%Y-%m-%d').date() if last_date_str else None
+    if not os.path.exists(csv_filepath):
+        return None
+    if not use_sidecar:
+        history_index.build_index(csv_filepath)
+    return _read_last_date(csv_filepath)
+
+def verify_history(state_name, city_name):
+    """
+    Recomputes the checksum of a city's CSV and compares it with its sidecar index. On a
+    mismatch (the file was changed in place without its size or mtime changing) the index is
+    rebuilt, so the typed copy, rollup and climatology, which record the checksum, are rebuilt
+    on their next use. Returns True when the index was correct (always for the SQLite backend).
+    """
+    if HISTORY_BACKEND == "sqlite":
+        return True
+    csv_filepath = history_csv_path(state_name, city_name)
+    if not os.path.exists(csv_filepath) or history_index.verify_index(csv_filepath):
+        return True
+    print(f"Warning: {csv_filepath} does not match its index checksum. Rebuilding the index.")
+    with file_lock.locked(csv_filepath):
+        history_index.build_index(csv_filepath)
+    return False
+
+def get_history_gaps(state_name, city_name):
+    """
+    Returns the number of missing days between a city's first and last stored day, from the
+    sidecar index (0 for a contiguous history, None when there is no CSV history).
+    """
+    index = history_index.get_index(history_csv_path(state_name, city_name))
+    return index["gaps"] if index else None
+
+def get_first_stored_date(state_name, city_name):
+    """Returns the first stored date for a city, or None when there is no history yet."""
+    if HISTORY_BACKEND == "sqlite":
+        first_date_str = history_db.get_date_bounds(state_name, city_name)[0]
+        return datetime.strptime(first_date_str, '%Y-%m-%d').date() if first_date_str else None
+    return _read_first_date(history_csv_path(state_name, city_name))
+
+def is_history_stale(state_name, city_name, today=None):
+    """
+    True when a city has no history yet, its history starts after HISTORY_START_DATE (it needs
+    a backfill), or its last stored day is before yesterday and upstream has not been checked
+    within SYNC_MIN_INTERVAL_SECONDS.
+    """
+    csv_filepath = history_csv_path(state_name, city_name)
+    last_date = get_high_water_mark(state_name, city_name)
+    if last_date is None:
+        return True
+    if get_first_stored_date(state_name, city_name) > HISTORY_START_DATE:
+        return True
+    today = today or datetime.now().date()
+    if last_date >= today - timedelta(days=1):
+        return False
+    return time.time() - _get_sync_state(csv_filepath).get("checked_at", 0) >= SYNC_MIN_INTERVAL_SECONDS
+
+def _append_new_rows(state_name, city_name, rows, last_date):
+    """
+    Appends the rows dated after last_date. It stops at the first row with missing values,
+    so incomplete days at the tail are fetched again on the next sync.
+
+    Returns:
+        tuple: (number of rows appended, new last date, True if stopped at an incomplete row)
+    """
+    if HISTORY_BACKEND == "sqlite":
+        new_rows, last_date, truncated = _select_new_rows(rows, last_date)
+        history_db.upsert_rows(state_name, city_name, new_rows)
+        return len(new_rows), last_date, truncated
+    return _save_rows(history_csv_path(state_name, city_name), rows, last_date)
+
+_sync_flight = SingleFlight()
+
+def sync_historical_data(state_name, city_name, state_city_data, start_date=HISTORY_START_DATE, end_date=None, force=False, show_errors=True):
+    """
+    Brings a city's history CSV up to date by fetching only the days after its high-water mark.
+    Concurrent syncs of the same city with the same arguments (forecast tab, historical tab,
+    warm-up) share a single fetch and write; callers that arrive while one is running get its result.
+    Ranges longer than SHARD_THRESHOLD_DAYS are fetched as year-sized shards and appended shard by shard.
+    When the stored history starts after start_date, the missing older years are then backfilled
+    (see backfill_historical_data).
+
+    Args:
+        state_name (str): State of the city.
+        city_name (str): City to sync.
+        state_city_data (dict): STATE_CITY_DATA.
+        start_date (date): First day to fetch when the city has no history yet.
+        end_date (date): Last day to fetch (defaults to today).
+        force (bool): Check upstream even if the city was checked within SYNC_MIN_INTERVAL_SECONDS.
+        show_errors (bool): Show fetch errors in a message box (False only prints them).
+
+    Returns:
+        int: Number of days added, or None when the fetch or the backfill failed.
+    """
+    # Only calls with the same arguments share a sync: a forced or user-initiated (show_errors)
+    # sync never receives the result of a warm-up sync that skipped the check or hid its errors.
+    key = (history_csv_path(state_name, city_name), start_date, end_date, force, show_errors)
+    return _sync_flight.do(key, _sync_historical_data,
+                           state_name, city_name, state_city_data, start_date, end_date, force, show_errors)
+
+def _sync_historical_data(state_name, city_name, state_city_data, start_date, end_date, force, show_errors):
+    city_info = state_city_data.get(state_name, {}).get(city_name)
+    if not city_info:
+        print(f"City information not found for {city_name}, {state_name}. Cannot sync.")
+        return None
+
+    added = _sync_new_days(state_name, city_name, city_info, start_date, end_date, force, show_errors)
+    if added is None:
+        return None
+    first_date = get_first_stored_date(state_name, city_name)
+    if first_date is None or start_date >= first_date:
+        return added
+    backfilled = backfill_historical_data(state_name, city_name, state_city_data, start_date)
+    return None if backfilled is None else added + backfilled
+
+def _sync_new_days(state_name, city_name, city_info, start_date, end_date, force, show_errors):
+    """Fetches and appends the days after the city's high-water mark (the forward half of a sync)."""
+    csv_filepath = history_csv_path(state_name, city_name)
+    end_date = end_date or datetime.now().date()
+    last_date = get_high_water_mark(state_name, city_name)
+
+    fetch_start = last_date + timedelta(days=1) if last_date else start_date
+    if fetch_start > end_date:
+        return 0  # Already up to date
+    checked_at = _get_sync_state(csv_filepath).get("checked_at", 0)
+    if last_date and not force and time.time() - checked_at < SYNC_MIN_INTERVAL_SECONDS:
+        return 0  # Upstream was checked recently; the archive only publishes new days with a lag
+
+    print(f"Syncing historical data for {city_name} from {fetch_start.isoformat()} to {end_date.isoformat()}.")
+    if (end_date - fetch_start).days + 1 > SHARD_THRESHOLD_DAYS:
+        return _sync_sharded(state_name, city_name, city_info, fetch_start, end_date, last_date)
+
+    data = fetch_historical_daily_data(city_info["lat"], city_info["lon"], city_info["timezone"],
+                                       fetch_start.isoformat(), end_date.isoformat(), show_errors=show_errors)
+    if not data or 'daily' not in data:
+        return None
+
+    try:
+        added, new_last_date, _ = _append_new_rows(state_name, city_name, daily_payload_to_rows(data['daily']), last_date)
+    except IOError as e:
+        show_error("File Error", f"Could not write to file {csv_filepath}: {e}")
+        return None
+    _set_sync_state(csv_filepath, new_last_date)
+    print(f"Appended {added} new days to {csv_filepath}")
+    return added
+
+def _sync_sharded(state_name, city_name, city_info, fetch_start, end_date, last_date):
+    """
+    Appends a long range shard by shard as the shards arrive (in date order), updating the
+    high-water mark after each one, so a failure part-way keeps everything before it.
+    The sync only counts as a check of upstream (checked_at) once every shard has arrived;
+    when a shard fails, None is returned and the next sync retries the missing range.
+    """
+    csv_filepath = history_csv_path(state_name, city_name)
+    previous_check = _get_sync_state(csv_filepath).get("checked_at", 0)
+    total_added = 0
+    shards = fetch_historical_daily_data_sharded(city_info["lat"], city_info["lon"], city_info["timezone"],
+                                                 fetch_start.isoformat(), end_date.isoformat())
+    try:
+        for shard_start, shard_end, payload in shards:
+            added, last_date, truncated = _append_new_rows(state_name, city_name, daily_payload_to_rows(payload['daily']), last_date)
+            _set_sync_state(csv_filepath, last_date, checked_at=previous_check)
+            total_added += added
+            print(f"Appended {added} days ({shard_start} to {shard_end}) to {csv_filepath}")
+            if truncated:
+                break  # Keep the file contiguous; the remaining days are fetched on a later sync
+    except ShardFetchError as e:
+        print(f"Sync of {city_name} stopped after {total_added} days: {e}")
+        return None
+    except IOError as e:
+        show_error("File Error", f"Could not write to file {csv_filepath}: {e}")
+        return None
+    finally:
+        shards.close()
+    _set_sync_state(csv_filepath, last_date)
+    return total_added
+
+def backfill_historical_data(state_name, city_name, state_city_data, start_date):
+    """
+    Extends a city's history backwards to start_date (e.g. for a 30-year climatology).
+    sync_historical_data calls it when the stored history starts after the requested start date.
+
+    The missing years are fetched as shards and streamed into a temporary file, the existing
+    rows are copied after them in chunks, and the result replaces the CSV in one rename.
+
+    Returns:
+        int: Number of days added, or None when nothing could be fetched.
+    """
+    city_info = state_city_data.get(state_name, {}).get(city_name)
+    csv_filepath = history_csv_path(state_name, city_name)
+    first_date = get_first_stored_date(state_name, city_name)
+    if not city_info or first_date is None:
+        # Nothing stored yet: a normal sync from start_date does the same job
+        return sync_historical_data(state_name, city_name, state_city_data, start_date=start_date, force=True)
+    if start_date >= first_date:
+        return 0
+
+    if HISTORY_BACKEND == "sqlite":
+        # Rows are keyed by date, so older shards are simply upserted
+        added = 0
+        try:
+            for _, _, payload in fetch_historical_daily_data_sharded(city_info["lat"], city_info["lon"], city_info["timezone"],
+                                                                     start_date.isoformat(), (first_date - timedelta(days=1)).isoformat()):
+                added += history_db.upsert_rows(state_name, city_name,
+                                                [row for row in daily_payload_to_rows(payload['daily']) if _row_is_complete(row)])
+        except ShardFetchError as e:
+            print(f"Backfill of {city_name} to {start_date} stopped after {added} days: {e}")
+            return None
+        return added
+
+    tmp_filepath = csv_filepath + ".backfill.tmp"
+    added = 0
+    last_date = None
+    shards = fetch_historical_daily_data_sharded(city_info["lat"], city_info["lon"], city_info["timezone"],
+                                                 start_date.isoformat(), (first_date - timedelta(days=1)).isoformat())
+    try:
+        with open(tmp_filepath, 'w', newline='', encoding='utf-8') as out:
+            writer = csv.DictWriter(out, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            for _, _, payload in shards:
+                for row in daily_payload_to_rows(payload['daily']):
+                    if _row_is_complete(row):
+                        writer.writerow(row)
+                        added += 1
+                        last_date = row["Date"]
+            if not added:
+                raise IOError("no complete days were returned")
+            if last_date != (first_date - timedelta(days=1)).isoformat():
+                raise IOError("the fetched range does not join up with the stored history")
+
+        # Only the copy of the stored rows and the rename need the file's lock; days appended
+        # while the shards were downloading are included in the copy.
+        with file_lock.locked(csv_filepath):
+            if _read_first_date(csv_filepath) != first_date:
+                raise IOError("the stored history changed while backfilling")
+            with open(tmp_filepath, 'a', newline='', encoding='utf-8') as out, \
+                    open(csv_filepath, 'r', newline='', encoding='utf-8') as existing:
+                existing.readline()  # Skip the header
+                while True:
+                    chunk = existing.read(1 << 16)
+                    if not chunk:
+                        break
+                    out.write(chunk)
+            os.replace(tmp_filepath, csv_filepath)
+            history_index.build_index(csv_filepath)
+            _rebuild_typed_copy(csv_filepath)
+    except IOError as e:
+        print(f"Backfill of {city_name} to {start_date} failed: {e}")
+        if os.path.exists(tmp_filepath):
+            os.remove(tmp_filepath)
+        return None
+    finally:
+        shards.close()
+    print(f"Backfilled {added} days for {city_name} ({start_date} to {first_date - timedelta(days=1)})")
+    return added
+
+def refresh_all_city_histories(state_city_data, end_date=None, cities=None):
+    """
+    Delta-syncs the history CSV of every configured city (or only `cities`) using batched
+    Open-Meteo requests, so all cities are fetched in a handful of round-trips instead of one
+    request per city. Cities are grouped by their first missing day and each group is fetched
+    from that day, so every city only downloads the days it is missing. Cities missing more
+    than SHARD_THRESHOLD_DAYS days, and cities whose history starts after HISTORY_START_DATE,
+    are left to sync_historical_data, which fetches long ranges as shards and backfills older years.
+
+    Args:
+        state_city_data (dict): STATE_CITY_DATA.
+        end_date (date): Last day to fetch (defaults to today).
+        cities (iterable): (state_name, city_name) pairs to refresh; all configured cities when None.
+
+    Returns:
+        dict: (state_name, city_name) -> days appended, or None when the city's batch failed.
+              Cities that were already up to date or left for a sharded sync are not included.
+    """
+    end_date = end_date or datetime.now().date()
+    wanted = set(cities) if cities is not None else None
+    stale = []
+    for state_name, city_info in iter_city_entries(state_city_data):
+        if wanted is not None and (state_name, city_info["name"]) not in wanted:
+            continue
+        last_date = get_high_water_mark(state_name, city_info["name"])
+        if last_date and get_first_stored_date(state_name, city_info["name"]) > HISTORY_START_DATE:
+            continue  # Needs a backfill
+        fetch_start = last_date + timedelta(days=1) if last_date else HISTORY_START_DATE
+        if fetch_start <= end_date and (end_date - fetch_start).days + 1 <= SHARD_THRESHOLD_DAYS:
+            stale.append((state_name, city_info, last_date, fetch_start))
+    if not stale:
+        return {}
+
+    # One batch per first missing day, so no city downloads days it already has
+    groups = {}
+    for entry in stale:
+        groups.setdefault(entry[3], []).append(entry)
+    payloads = {}
+    for fetch_start, entries in sorted(groups.items()):
+        payloads.update(fetch_historical_daily_data_batch(
+            [(state_name, city_info) for state_name, city_info, _, _ in entries],
+            fetch_start.isoformat(), end_date.isoformat()
+        ))
+
+    results = {}
+    for state_name, city_info, last_date, _ in stale:
+        key = (state_name, city_info["name"])
+        payload = payloads.get(key)
+        if not payload or 'daily' not in payload:
+            results[key] = None
+            continue
+        csv_filepath = history_csv_path(state_name, city_info["name"])
+        try:
+            added, new_last_date, _ = _append_new_rows(state_name, city_info["name"], daily_payload_to_rows(payload['daily']), last_date)
+        except IOError as e:
+            print(f"Could not write to file {csv_filepath}: {e}")
+            results[key] = None
+            continue
+        _set_sync_state(csv_filepath, new_last_date)
+        results[key] = added
+    return results
+
+
+# --- Read path (shared by the chart tabs) ---
+
+def has_history(state_name, city_name):
+    """True when the configured backend holds any history for the city."""
+    if HISTORY_BACKEND == "sqlite":
+        return history_db.get_last_date_str(state_name, city_name) is not None
+    csv_filepath = history_csv_path(state_name, city_name)
+    return os.path.exists(csv_filepath) and os.path.getsize(csv_filepath) > 0
+
+def read_history_rows(state_name, city_name, start_date_str=None, end_date_str=None):
+    """
+    Returns a city's daily rows (dicts keyed by FIELDNAMES) between start and end inclusive.
+    With the SQLite backend only the requested range is read from the (state, city, date) index.
+    """
+    if HISTORY_BACKEND == "sqlite":
+        return history_db.query_range(state_name, city_name, start_date_str, end_date_str)
+    csv_filepath = history_csv_path(state_name, city_name)
+    index = history_index.get_index(csv_filepath)
+    rows = []
+    with open(csv_filepath, 'r', newline='', encoding='utf-8') as csvfile:
+        header = next(csv.reader([csvfile.readline()]), FIELDNAMES)
+        if start_date_str and index and index["ordered"]:
+            csvfile.seek(history_index.offset_for_date(index, start_date_str))  # Skip whole months before the range
+        for row in csv.DictReader(csvfile, fieldnames=header):
+            date_str = row.get('Date') or ''
+            if end_date_str and date_str > end_date_str:
+                if index and index["ordered"]:
+                    break  # Rows are stored in date order
+                continue
+            if start_date_str and date_str < start_date_str:
+                continue
+            rows.append(row)
+    return rows
+
+def read_history_records(state_name, city_name, start_date_str=None, end_date_str=None):
+    """
+    Returns a city's days between start and end inclusive as a zero-copy view of its
+    memory-mapped fixed-width record file (see record_store), or None when it has no CSV history.
+    """
+    records = record_store.open_records(history_csv_path(state_name, city_name))
+    return record_store.window(records, start_date_str, end_date_str)
+
+def read_history_columns(state_name, city_name, start_date_str=None, end_date_str=None):
+    """
+    Returns a city's days between start and end inclusive as typed column arrays, views of its
+    memory-mapped columnar copy (see history_store), or None when it has no CSV history.
+    """
+    columns = history_store.load_columns(history_csv_path(state_name, city_name))
+    return history_store.window(columns, start_date_str, end_date_str)
+
+def load_daily_series(state_name, city_name, start_date_str=None, end_date_str=None):
+    """
+    Loads a city's days between start and end inclusive as a DailySeries, built once and shared
+    by the charts. With CSV storage it is read from the typed copy selected by HISTORY_READ_FORMAT
+    (columnar .npy files by default, or the fixed-width records) without parsing any text;
+    otherwise, or with HISTORY_READ_FORMAT=csv, from the backend's rows.
+    """
+    if HISTORY_BACKEND != "sqlite" and HISTORY_READ_FORMAT == "columnar":
+        return DailySeries.from_columns(read_history_columns(state_name, city_name, start_date_str, end_date_str))
+    if HISTORY_BACKEND != "sqlite" and HISTORY_READ_FORMAT == "records":
+        return DailySeries.from_records(read_history_records(state_name, city_name, start_date_str, end_date_str))
+    return DailySeries.from_rows(read_history_rows(state_name, city_name, start_date_str, end_date_str))
+
+def load_monthly_rollup(state_name, city_name):
+    """
+    Returns a city's monthly aggregates (see rollups.compute_rollup). With CSV storage they come
+    from the persistent rollup file, which appends keep up to date; the SQLite backend computes
+    them from the loaded series.
+    """
+    if HISTORY_BACKEND == "sqlite":
+        return rollups.compute_rollup(load_daily_series(state_name, city_name))
+    return rollups.get_monthly_rollup(history_csv_path(state_name, city_name))
+
+def load_climatology(state_name, city_name):
+    """
+    Returns a city's day-of-year normals and percentiles (climatology.Climatology), or None when
+    it has no history. With CSV storage they come from the cached file that appends keep up to
+    date; the SQLite backend computes them from the loaded series.
+    """
+    if not has_history(state_name, city_name):
+        return None
+    if HISTORY_BACKEND == "sqlite":
+        return climatology.Climatology.from_series(load_daily_series(state_name, city_name))
+    return climatology.get_climatology(history_csv_path(state_name, city_name))
@@ -0,0 +1,112 @@
+# features/daily_series.py
+import numpy as np
+
+from features.aggregation import window_slice, trailing_window_slice
+
+
+class DailySeries:
+    """
+    A city's daily history as contiguous typed arrays, built once per load and shared by
+    every chart and statistic (instead of one dict of strings per CSV row).
+
+    dates is datetime64[D] in ascending order; the value columns are float32 arrays of the
+    same length. Built from the columnar store or the record store the arrays are views of the
+    memory-mapped files.
+    """
+
+    __slots__ = ("dates", "max_temp", "min_temp", "precip", "max_wind")
+
+    def __init__(self, dates, max_temp, min_temp, precip, max_wind):
+        self.dates = dates
+        self.max_temp = max_temp
+        self.min_temp = min_temp
+        self.precip = precip
+        self.max_wind = max_wind
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype="datetime64[D]"), *(np.empty(0, dtype=np.float32) for _ in range(4)))
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Builds a series from row dicts keyed by the CSV field names; rows without both temperatures are skipped."""
+        dates, max_temps, min_temps, precips, winds = [], [], [], [], []
+        for row in rows:
+            try:
+                day = np.datetime64(row["Date"], "D")
+                max_temp = float(row["Max Temperature (°F)"])
+                min_temp = float(row["Min Temperature (°F)"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if np.isnat(day):
+                continue
+            dates.append(day)
+            max_temps.append(max_temp)
+            min_temps.append(min_temp)
+            precips.append(_to_float(row.get("Precipitation (inch)")))
+            winds.append(_to_float(row.get("Max Wind Speed (mph)")))
+        series = cls(np.array(dates, dtype="datetime64[D]"), np.array(max_temps, dtype=np.float32), np.array(min_temps, dtype=np.float32),
+                     np.array(precips, dtype=np.float32), np.array(winds, dtype=np.float32))
+        return series.sorted()
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Builds a series from history_store columns; the arrays stay zero-copy views of the memory-mapped .npy files."""
+        if columns is None or not len(columns["date"]):
+            return cls.empty()
+        return cls(columns["date"], columns["max_temp"], columns["min_temp"], columns["precip"], columns["max_wind"])
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Builds a series from record_store records. Days without temperatures (gap fillers)
+        are dropped; when there are none the columns stay zero-copy views of the records.
+        """
+        if records is None or not len(records):
+            return cls.empty()
+        valid = ~(np.isnan(records["max_temp"]) | np.isnan(records["min_temp"]))
+        if not valid.all():
+            records = records[valid]
+        return cls(records["day"].astype("datetime64[D]"), records["max_temp"], records["min_temp"],
+                   records["precip"], records["max_wind"])
+
+    def __len__(self):
+        return len(self.dates)
+
+    def sorted(self):
+        if len(self.dates) < 2 or (self.dates[1:] >= self.dates[:-1]).all():
+            return self
+        order = np.argsort(self.dates, kind="stable")
+        return self._take(order)
+
+    def _take(self, selector):
+        return DailySeries(self.dates[selector], self.max_temp[selector], self.min_temp[selector],
+                           self.precip[selector], self.max_wind[selector])
+
+    @property
+    def avg_temp(self):
+        """Daily mean of the max and min temperature."""
+        return (self.max_temp + self.min_temp) / 2
+
+    @property
+    def first_date(self):
+        return self.dates[0].item() if len(self.dates) else None
+
+    @property
+    def last_date(self):
+        return self.dates[-1].item() if len(self.dates) else None
+
+    def window(self, start_date=None, end_date=None):
+        """Days from start_date to end_date inclusive (binary search; the arrays are sliced, not copied)."""
+        return self._take(window_slice(self.dates, start_date, end_date))
+
+    def last_days(self, days):
+        """The last `days` calendar days up to and including the latest stored day."""
+        return self._take(trailing_window_slice(self.dates, days))
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
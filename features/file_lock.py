@@ -0,0 +1,163 @@
+# features/file_lock.py
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Per-file advisory locks for the history files. Each file has its own lock, so refreshes of
+# different cities never wait on each other. A lock is held in two layers: a re-entrant
+# threading lock for the threads of this process, and an OS lock on <file>.lock so other app
+# instances (e.g. on a shared drive) wait as well.
+LOCK_TIMEOUT_SECONDS = 30
+_POLL_SECONDS = 0.05
+
+
+class FileLockTimeout(IOError):
+    pass
+
+
+class _PathLock:
+    def __init__(self, path):
+        self.lock_path = path + ".lock"
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.handle = None
+
+    def _lock_os(self, deadline):
+        handle = open(self.lock_path, "a+b")
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                self.handle = handle
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    handle.close()
+                    raise FileLockTimeout(f"Timed out waiting for lock on {self.lock_path}")
+                time.sleep(_POLL_SECONDS)
+
+    def _unlock_os(self):
+        try:
+            if fcntl:
+                fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+            else:
+                self.handle.seek(0)
+                msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.handle.close()
+            self.handle = None
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _reset_after_fork():
+    # A forked child must not inherit locks held by threads that do not exist in it
+    global _locks, _locks_guard
+    _locks = {}
+    _locks_guard = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _path_lock(path):
+    key = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = _PathLock(path)
+        return lock
+
+
+@contextmanager
+def locked(path, timeout=LOCK_TIMEOUT_SECONDS):
+    """
+    Holds the lock for path (re-entrant within a thread). Any append left half-done by a
+    crashed writer is rolled back (see journal_append) before the caller gets the lock.
+
+    Raises:
+        FileLockTimeout: The lock was not obtained within timeout seconds.
+    """
+    lock = _path_lock(path)
+    deadline = time.monotonic() + timeout
+    if not lock.thread_lock.acquire(timeout=timeout):
+        raise FileLockTimeout(f"Timed out waiting for lock on {path}")
+    try:
+        if lock.depth == 0:
+            lock._lock_os(deadline)
+            recover_journal(path)
+        lock.depth += 1
+        try:
+            yield
+        finally:
+            lock.depth -= 1
+            if lock.depth == 0:
+                lock._unlock_os()
+    finally:
+        lock.thread_lock.release()
+
+
+def _journal_path(path):
+    return path + ".journal"
+
+
+def recover_journal(path):
+    """
+    Finishes or rolls back an append interrupted by a crash: if the journal says the file
+    should be offset + length bytes long and it is not, the file is cut back to offset.
+    """
+    journal_path = _journal_path(path)
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError):
+        entry = None  # Torn journal: the append never started
+    if entry and os.path.exists(path) and os.path.getsize(path) != entry["offset"] + entry["length"]:
+        with open(path, "r+b") as f:
+            f.truncate(entry["offset"])
+        print(f"Rolled back an interrupted append to {path}")
+    os.remove(journal_path)
+
+
+def journal_append(path, data):
+    """
+    Appends data to path as one journaled write; the caller must hold locked(path).
+    The journal records the pre-append size before any byte is written, so a crash part-way
+    leaves the file recoverable to its previous state.
+
+    Returns:
+        int: The offset the data was written at.
+    """
+    offset = os.path.getsize(path) if os.path.exists(path) else 0
+    journal_path = _journal_path(path)
+    with open(journal_path, "w", encoding="utf-8") as f:
+        json.dump({"offset": offset, "length": len(data)}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    with open(path, "ab") as f:
+        try:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        except Exception:
+            f.truncate(offset)
+            os.remove(journal_path)
+            raise
+    os.remove(journal_path)
+    return offset
@@ -0,0 +1,90 @@
+# features/forecast_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+
+from features.config import FORECAST_CACHE_DIR, FORECAST_CACHE_TTL_SECONDS, FORECAST_CACHE_MAX_ENTRIES
+
+_cache_lock = threading.Lock()
+
+
+def _cache_key(lat, lon, units, cnt):
+    """Builds a stable file-safe key from the request parameters (the API key is deliberately excluded)."""
+    raw = f"{round(float(lat), 4)}|{round(float(lon), 4)}|{units}|{int(cnt)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(FORECAST_CACHE_DIR, f"{key}.json")
+
+
+def get_cached_forecast(lat, lon, units, cnt, ttl_seconds=None):
+    """
+    Returns the cached forecast response for (lat, lon, units, cnt), or None when
+    there is no entry or the entry is older than the TTL.
+    A hit refreshes the entry's position in the LRU order.
+    """
+    if ttl_seconds is None:
+        ttl_seconds = FORECAST_CACHE_TTL_SECONDS
+    path = _cache_path(_cache_key(lat, lon, units, cnt))
+    with _cache_lock:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+        if time.time() - entry.get("fetched_at", 0) > ttl_seconds:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            os.utime(path, None)  # mtime doubles as the LRU "last used" timestamp
+        except OSError:
+            pass
+        return entry.get("data")
+
+
+def store_forecast(lat, lon, units, cnt, data, max_entries=None):
+    """
+    Stores a forecast response and evicts the least recently used entries
+    when the cache holds more than max_entries files.
+    """
+    if max_entries is None:
+        max_entries = FORECAST_CACHE_MAX_ENTRIES
+    path = _cache_path(_cache_key(lat, lon, units, cnt))
+    with _cache_lock:
+        try:
+            os.makedirs(FORECAST_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fetched_at": time.time(), "data": data}, f)
+            os.replace(tmp_path, path)
+            _evict_lru(max_entries)
+        except OSError as e:
+            print(f"Warning: Could not write forecast cache {path}: {e}")
+
+
+def _evict_lru(max_entries):
+    entries = []
+    for name in os.listdir(FORECAST_CACHE_DIR):
+        if not name.endswith(".json"):
+            continue
+        full_path = os.path.join(FORECAST_CACHE_DIR, name)
+        try:
+            entries.append((os.path.getmtime(full_path), full_path))
+        except OSError:
+            continue
+    if len(entries) <= max_entries:
+        return
+    entries.sort()
+    for _, full_path in entries[:len(entries) - max_entries]:
+        try:
+            os.remove(full_path)
+        except OSError:
+            pass
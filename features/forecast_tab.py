@@ -4,14 +4,16 @@ import tkinter.ttk as ttk
 from tkinter import messagebox
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
+import numpy as np
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import os
 import matplotlib.font_manager as fm
 
 # Import from local features package
 from features.config import STATE_CITY_DATA, OWM_WEATHER_EMOJIS, emoji_font
-from features.api import fetch_owm_forecast, fetch_historical_daily_data
-from features.csv_files import create_historical_data_csv
+from features.api import fetch_owm_forecast
+from features.csv_files import load_climatology, sync_historical_data
+from features.background import BackgroundRunner
 
 
 class ForecastTab(ttk.Frame):
@@ -19,6 +21,7 @@ class ForecastTab(ttk.Frame):
         super().__init__(parent_notebook)
         self.parent_notebook = parent_notebook
         self.STATE_CITY_DATA = STATE_CITY_DATA  # Add this line
+        self.runner = BackgroundRunner(self)  # Network calls and CSV writes run off the Tk thread
         self.create_widgets()
 
     def create_widgets(self):
@@ -83,7 +86,8 @@ class ForecastTab(ttk.Frame):
         self.num_days_var.set("7")  # Default value
         # --- End Number of Days Dropdown ---
 
-        self.state_dropdown.bind("<<ComboboxSelected>>", self.update_cities_dropdown)
+        self.state_dropdown.bind("<<ComboboxSelected>>", self._on_state_selected)
+        self.city_dropdown.bind("<<ComboboxSelected>>", self.cancel_pending)
         self.update_cities_dropdown()
 
         # --- Chart Type Radio Buttons ---
@@ -99,6 +103,9 @@ class ForecastTab(ttk.Frame):
 
         line_radio = tk.Radiobutton(chart_type_frame, text="Line Chart", variable=self.chart_type, value="line", font=("Arial", 12))
         line_radio.pack(side=tk.LEFT)
+
+        anomaly_radio = tk.Radiobutton(chart_type_frame, text="Vs Normal", variable=self.chart_type, value="anomaly", font=("Arial", 12))
+        anomaly_radio.pack(side=tk.LEFT)
         # --- End Chart Type Radio Buttons ---
 
         style = ttk.Style()
@@ -113,9 +120,21 @@ class ForecastTab(ttk.Frame):
         get_btn = ttk.Button(dropdown_frame, text="Update Chart", style='Rounded.TButton', width=15, command=self.get_weekly_forecast)
         get_btn.pack(side=tk.LEFT, padx=10)
 
+        # --- Status bar with progress indicator ---
+        status_frame = tk.Frame(self)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=5)
+        self.progress = ttk.Progressbar(status_frame, mode="indeterminate", length=150)
+        self.progress.pack(side=tk.RIGHT, padx=10)
+        self.status_label = ttk.Label(status_frame, text="Ready.")
+        self.status_label.pack(side=tk.LEFT, padx=10)
+
         self.graph_frame = tk.Frame(self)
         self.graph_frame.pack(pady=10, fill="both", expand=True)
 
+    def _on_state_selected(self, event=None):
+        self.update_cities_dropdown()
+        self.cancel_pending()
+
     def update_cities_dropdown(self, event=None):
         selected_state = self.state_var.get()
         cities_in_state = sorted(list(STATE_CITY_DATA.get(selected_state, {}).keys()))
@@ -142,158 +161,248 @@ class ForecastTab(ttk.Frame):
             tk.Label(self.graph_frame, text="Selected city data not found.", fg="red").pack()
             return
 
-        lat = city_info["lat"]
-        lon = city_info["lon"]
-        timezone = city_info["timezone"]
+        # --- Fetch 14-Day Forecast (OpenWeatherMap Daily Forecast API) in the background ---
+        # Submitting under the same key cancels any forecast still in flight for a previous city.
+        self._set_status(f"Fetching forecast for {selected_city_name}...", busy=True)
+        self.runner.submit(
+            "forecast", self._fetch_forecast_task, selected_state_name, city_info,
+            on_done=lambda data: self._on_forecast_loaded(data, selected_city_name, num_forecast_days),
+            on_error=lambda e: self._on_task_failed(f"Failed to fetch forecast for {selected_city_name}: {e}"),
+            on_progress=self._set_status
+        )
+
+        # --- Automatically Get Historical Data (Open-Meteo) in the background ---
+        self.runner.submit(
+            "history", self._save_history_task, selected_state_name, selected_city_name, city_info,
+            on_done=lambda saved: self._on_history_saved(saved, selected_city_name),
+            on_error=lambda e: self._on_task_failed(f"Historical data save failed for {selected_city_name}: {e}"),
+            on_progress=self._set_status
+        )
 
-        # --- Fetch 14-Day Forecast (OpenWeatherMap Daily Forecast API) ---
+    def _fetch_forecast_task(self, task, state_name, city_info):
+        """
+        Runs on a worker thread: fetches the forecast (or serves it from the cache) and loads the
+        city's precomputed climatology, which is None when it has no stored history yet.
+        """
+        task.report(f"Fetching forecast for {city_info['name']}...")
         forecast_data = fetch_owm_forecast(city_info)
+        try:
+            normals = load_climatology(state_name, city_info['name'])
+        except (OSError, ValueError) as e:
+            print(f"Could not load climatology for {city_info['name']}: {e}")
+            normals = None
+        return forecast_data, normals
+
+    def _save_history_task(self, task, state_name, city_name, city_info):
+        """Runs on a worker thread: appends the days missing from the city's history CSV."""
+        task.report(f"Syncing historical data for {city_name}...")
+        added = sync_historical_data(state_name, city_name, self.STATE_CITY_DATA)
+        if added is None:
+            return None
+        return True
+
+    def _on_forecast_loaded(self, data, selected_city_name, num_forecast_days):
+        forecast_data, normals = data
+        self._render_forecast(forecast_data, selected_city_name, num_forecast_days, normals)
+        self._refresh_status(f"Forecast for {selected_city_name} updated.")
+
+    def _on_history_saved(self, saved, city_name):
+        if saved is None:
+            messagebox.showwarning("Historical Data Save Failed",
+                                   f"Could not fetch historical data for {city_name} to save to CSV.")
+        self._refresh_status(f"Historical data for {city_name} is up to date." if saved else "Ready.")
+
+    def _on_task_failed(self, message):
+        tk.Label(self.graph_frame, text=message, fg="red").pack()
+        self._refresh_status("Ready.")
+
+    def cancel_pending(self, event=None):
+        """Drops in-flight fetches for the previously selected city."""
+        self.runner.cancel("forecast")
+        self.runner.cancel("history")
+        self._refresh_status("Ready.")
+
+    def _set_status(self, text, busy=None):
+        self.status_label.config(text=text)
+        if busy is True:
+            self.progress.start(10)
+        elif busy is False:
+            self.progress.stop()
+
+    def _refresh_status(self, text):
+        # Keep the progress bar running while any fetch is still in flight
+        busy = self.runner.is_running("forecast") or self.runner.is_running("history")
+        self._set_status(text, busy=busy)
+
+    def _render_forecast(self, forecast_data, selected_city_name, num_forecast_days, normals=None):
+        for widget in self.graph_frame.winfo_children():
+            widget.destroy()
 
-        if forecast_data:
-            # The daily forecast data is in the 'list' key
-            daily_forecasts = forecast_data["list"][:num_forecast_days] # Limit to selected number of days
-
-            # --- Add current weather summary boxes (using the first day's forecast data) ---
-            current_day_data = daily_forecasts[0]
-            curr_temp_max = current_day_data["temp"]["max"]
-            curr_temp_min = current_day_data["temp"]["min"]
-            curr_precip = current_day_data.get("pop", 0) * 100
-            curr_wind = current_day_data["speed"] # Key is 'speed' in this API response
-            curr_desc = current_day_data["weather"][0]["description"].capitalize()
-
-            summary_frame = tk.Frame(self.graph_frame)
-            summary_frame.pack(pady=10)
-
-            # --- Weather Icon and Description ---
-            weather_emoji, weather_color = OWM_WEATHER_EMOJIS.get(curr_desc.lower(), ('❓', '#CCCCCC'))
-            weather_text = f"{curr_desc}\n{weather_emoji}"
-
-            emoji_box = tk.Label(summary_frame, text=weather_text, font=("Arial", 16, "bold"),
-                                 bg="#B0C4DE", width=16, height=3, relief="groove", bd=2)
-            emoji_box.pack(side=tk.LEFT, padx=10)
-
-            temp_box = tk.Label(summary_frame, text=f"Today's Temp\n{curr_temp_max:.1f}°F / {curr_temp_min:.1f}°F", font=("Arial", 14, "bold"),
-                                 bg="#FFD700", width=16, height=3, relief="groove", bd=2)
-            temp_box.pack(side=tk.LEFT, padx=10)
-
-            precip_box = tk.Label(summary_frame, text=f"Precipitation\n{curr_precip:.0f}%", font=("Arial", 14, "bold"),
-                                  bg="#87CEEB", width=16, height=3, relief="groove", bd=2)
-            precip_box.pack(side=tk.LEFT, padx=10)
-
-            wind_box = tk.Label(summary_frame, text=f"Wind Speed\n{curr_wind:.1f} mph", font=("Arial", 14, "bold"),
-                                 bg="#B0C4DE", width=16, height=3, relief="groove", bd=2)
-            wind_box.pack(side=tk.LEFT, padx=10)
-            # --- End summary boxes ---
-
-            dates = []
-            temps = []
-            descs = []
-            temps_max = []  # Initialize temps_max
-            temps_min = []  # Initialize temps_min
-
-            for day_data in daily_forecasts:
-                date_obj = datetime.fromtimestamp(day_data["dt"]).date()
-                dates.append(date_obj.strftime("%Y-%m-%d"))
-                
-                # Use daily average temperature for the graph
-                daily_avg_temp = (day_data["temp"]["max"] + day_data["temp"]["min"]) / 2
-                temps.append(daily_avg_temp)
-                
-                description = day_data["weather"][0]["description"].capitalize()
-                descs.append(description)
-                print(f"Weather Description from API: {description}")  # Add this line
-                
-                temps_max.append(day_data["temp"]["max"]) # Append max temp
-                temps_min.append(day_data["temp"]["min"]) # Append min temp
-
-            chart_type = self.chart_type.get()
-
-            try:
-                plt.rcParams['font.family'] = ['Segoe UI Emoji', 'sans-serif']
-            except:
-                plt.rcParams['font.family'] = ['sans-serif']
-
-            fig, ax = plt.subplots(figsize=(10, 5))
-            fig.patch.set_facecolor("#8baaed")
-            ax.set_facecolor("#0154fb")
-            for spine in ax.spines.values():
-                spine.set_visible(False)
-            if chart_type == "bar":
-                bar_colors = [
-                    OWM_WEATHER_EMOJIS.get(desc.lower(), ('❓', '#CCCCCC'))[1]
-                    for desc in descs
-                ]
-                bars = ax.bar(range(len(dates)), temps_max, color=bar_colors)
-                ax.set_ylabel("Max Temperature (°F)")
-                ax.set_title(f"{num_forecast_days}-Day Forecast for {selected_city_name}", pad=20, fontsize=16, fontweight='bold')
-                ax.set_xticks(range(len(dates)))
-                ax.set_xticklabels(dates, rotation=45, ha='right')
-
-                for i, bar in enumerate(bars):
-                    height = bar.get_height()
-                    desc = descs[i] if i < len(descs) and isinstance(descs[i], str) else ''
-                    emoji, _ = OWM_WEATHER_EMOJIS.get(desc.lower(), ('❓', "#FF0000"))
-                    emoji_color_map = {
-                        '☀️': "#FFE600", '🌤️': '#1E90FF', '⛅': '#4682B4', '☁️': '#808080',
-                        '🌦️': '#00BFFF', '🌧️': '#4169E1', '⛈️': '#8B0000', '🌨️': '#A9A9A9',
-                        '🌫️': '#A0522D', '❓': '#FF0000',
-                        '🌩️': '#800080', '🌪️': '#696969', '🌬️': '#B0E0E6', '🌈': '#FF69B4',
-                        '🔥': '#FF4500', '🧊': '#00CED1', '🌡️': '#DC143C', '💧': '#1E90FF',
-                        '🌀': '#4682B4', '🌁': '#A9A9A9', '🌻': '#FFD700', '🌵': '#DEB887',
-                        '🌲': '#228B22', '🌳': '#32CD32', '🌴': '#2E8B57', '🌾': '#F5DEB3',
-                        '🌋': '#B22222', '🌕': '#FFFF00', '🌑': '#2F4F4F', '🌙': '#F0E68C',
-                        '⭐': '#FFD700', '⚡': '#FFFF00', '❄️': '#B0E0E6', '☔': '#1E90FF',
-                        '☃️': '#B0E0E6', '🛑': '#FF0000'
-                    }
-                    
-                    color = emoji_color_map.get(emoji, '#FF0000')
-                    ax.annotate(
-                        emoji,
-                        xy=(bar.get_x() + bar.get_width() / 1.3, height),
-                        xytext=(0, 0), textcoords="offset points",
-                        ha='center', va='bottom', fontsize=20, fontweight='bold',
-                        color=color,
-                    )
-            elif chart_type == "line":
-                ax.plot(dates, temps_max, marker='o', linestyle='-', color='red', label='Max Temp')
-                ax.plot(dates, temps_min, marker='o', linestyle='-', color='yellow', label='Min Temp')
-                ax.set_ylabel("Temperature (°F)")
-                ax.set_title(f"{num_forecast_days}-Day Temperature Trend for {selected_city_name}", pad=20, fontsize=16, fontweight='bold')
-                ax.set_xticks(range(len(dates)))
-                ax.set_xticklabels(dates, rotation=45, ha='right')
-                ax.legend()
-
-            plt.tight_layout()
-            canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill="both", expand=True)
-            plt.close(fig)
-        else:
+        if not forecast_data:
             tk.Label(self.graph_frame, text=f"Failed to fetch 14-day forecast for {selected_city_name}.", fg="red").pack()
-
-        # --- Automatically Get Historical Data (Open-Meteo) ---
-        hist_start_date = datetime(2024, 7, 1).date()
-        hist_end_date = datetime.now().date()
-
-        if hist_start_date > hist_end_date:
-            print(f"Historical data fetch skipped for {selected_city_name}: start date ({hist_start_date}) is after end date ({hist_end_date}).")
             return
 
-        hist_start_date_str = hist_start_date.isoformat()
-        hist_end_date_str = hist_end_date.isoformat()
-
-        print(f"Fetching historical data for {selected_city_name} "
-              f"from {hist_start_date_str} to {hist_end_date_str} for CSV.")
-
-        historical_weather_data = fetch_historical_daily_data(
-            lat, lon, timezone, hist_start_date_str, hist_end_date_str
-        )
-
-        if historical_weather_data:
-            create_historical_data_csv(
-                selected_state_name, selected_city_name, historical_weather_data,
-                hist_start_date_str, hist_end_date_str, self.STATE_CITY_DATA
-            )
-        else:
-            messagebox.showwarning("Historical Data Save Failed",
-                                   f"Could not fetch historical data for {selected_city_name} to save to CSV.")
\ No newline at end of file
+        # The daily forecast data is in the 'list' key. The response may come from the
+        # forecast cache, so skip any days that are already in the past before slicing.
+        today = datetime.now().date()
+        upcoming = [day for day in forecast_data["list"] if datetime.fromtimestamp(day["dt"]).date() >= today]
+        daily_forecasts = (upcoming or forecast_data["list"])[:num_forecast_days] # Limit to selected number of days
+
+        # --- Add current weather summary boxes (using the first day's forecast data) ---
+        current_day_data = daily_forecasts[0]
+        curr_temp_max = current_day_data["temp"]["max"]
+        curr_temp_min = current_day_data["temp"]["min"]
+        curr_precip = current_day_data.get("pop", 0) * 100
+        curr_wind = current_day_data["speed"] # Key is 'speed' in this API response
+        curr_desc = current_day_data["weather"][0]["description"].capitalize()
+
+        summary_frame = tk.Frame(self.graph_frame)
+        summary_frame.pack(pady=10)
+
+        # --- Weather Icon and Description ---
+        weather_emoji, weather_color = OWM_WEATHER_EMOJIS.get(curr_desc.lower(), ('❓', '#CCCCCC'))
+        weather_text = f"{curr_desc}\n{weather_emoji}"
+
+        emoji_box = tk.Label(summary_frame, text=weather_text, font=("Arial", 16, "bold"),
+                             bg="#B0C4DE", width=16, height=3, relief="groove", bd=2)
+        emoji_box.pack(side=tk.LEFT, padx=10)
+
+        temp_box = tk.Label(summary_frame, text=f"Today's Temp\n{curr_temp_max:.1f}°F / {curr_temp_min:.1f}°F", font=("Arial", 14, "bold"),
+                             bg="#FFD700", width=16, height=3, relief="groove", bd=2)
+        temp_box.pack(side=tk.LEFT, padx=10)
+
+        precip_box = tk.Label(summary_frame, text=f"Precipitation\n{curr_precip:.0f}%", font=("Arial", 14, "bold"),
+                              bg="#87CEEB", width=16, height=3, relief="groove", bd=2)
+        precip_box.pack(side=tk.LEFT, padx=10)
+
+        wind_box = tk.Label(summary_frame, text=f"Wind Speed\n{curr_wind:.1f} mph", font=("Arial", 14, "bold"),
+                             bg="#B0C4DE", width=16, height=3, relief="groove", bd=2)
+        wind_box.pack(side=tk.LEFT, padx=10)
+        # --- End summary boxes ---
+
+        dates = []
+        temps = []
+        descs = []
+        temps_max = []  # Initialize temps_max
+        temps_min = []  # Initialize temps_min
+
+        for day_data in daily_forecasts:
+            date_obj = datetime.fromtimestamp(day_data["dt"]).date()
+            dates.append(date_obj.strftime("%Y-%m-%d"))
+            
+            # Use daily average temperature for the graph
+            daily_avg_temp = (day_data["temp"]["max"] + day_data["temp"]["min"]) / 2
+            temps.append(daily_avg_temp)
+            
+            description = day_data["weather"][0]["description"].capitalize()
+            descs.append(description)
+            print(f"Weather Description from API: {description}")  # Add this line
+            
+            temps_max.append(day_data["temp"]["max"]) # Append max temp
+            temps_min.append(day_data["temp"]["min"]) # Append min temp
+
+        chart_type = self.chart_type.get()
+
+        try:
+            plt.rcParams['font.family'] = ['Segoe UI Emoji', 'sans-serif']
+        except:
+            plt.rcParams['font.family'] = ['sans-serif']
+
+        fig, ax = plt.subplots(figsize=(10, 5))
+        fig.patch.set_facecolor("#8baaed")
+        ax.set_facecolor("#0154fb")
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+        if chart_type == "bar":
+            bar_colors = [
+                OWM_WEATHER_EMOJIS.get(desc.lower(), ('❓', '#CCCCCC'))[1]
+                for desc in descs
+            ]
+            bars = ax.bar(range(len(dates)), temps_max, color=bar_colors)
+            ax.set_ylabel("Max Temperature (°F)")
+            ax.set_title(f"{num_forecast_days}-Day Forecast for {selected_city_name}", pad=20, fontsize=16, fontweight='bold')
+            ax.set_xticks(range(len(dates)))
+            ax.set_xticklabels(dates, rotation=45, ha='right')
+
+            for i, bar in enumerate(bars):
+                height = bar.get_height()
+                desc = descs[i] if i < len(descs) and isinstance(descs[i], str) else ''
+                emoji, _ = OWM_WEATHER_EMOJIS.get(desc.lower(), ('❓', "#FF0000"))
+                emoji_color_map = {
+                    '☀️': "#FFE600", '🌤️': '#1E90FF', '⛅': '#4682B4', '☁️': '#808080',
+                    '🌦️': '#00BFFF', '🌧️': '#4169E1', '⛈️': '#8B0000', '🌨️': '#A9A9A9',
+                    '🌫️': '#A0522D', '❓': '#FF0000',
+                    '🌩️': '#800080', '🌪️': '#696969', '🌬️': '#B0E0E6', '🌈': '#FF69B4',
+                    '🔥': '#FF4500', '🧊': '#00CED1', '🌡️': '#DC143C', '💧': '#1E90FF',
+                    '🌀': '#4682B4', '🌁': '#A9A9A9', '🌻': '#FFD700', '🌵': '#DEB887',
+                    '🌲': '#228B22', '🌳': '#32CD32', '🌴': '#2E8B57', '🌾': '#F5DEB3',
+                    '🌋': '#B22222', '🌕': '#FFFF00', '🌑': '#2F4F4F', '🌙': '#F0E68C',
+                    '⭐': '#FFD700', '⚡': '#FFFF00', '❄️': '#B0E0E6', '☔': '#1E90FF',
+                    '☃️': '#B0E0E6', '🛑': '#FF0000'
+                }
+                
+                color = emoji_color_map.get(emoji, '#FF0000')
+                ax.annotate(
+                    emoji,
+                    xy=(bar.get_x() + bar.get_width() / 1.3, height),
+                    xytext=(0, 0), textcoords="offset points",
+                    ha='center', va='bottom', fontsize=20, fontweight='bold',
+                    color=color,
+                )
+        elif chart_type == "line":
+            ax.plot(dates, temps_max, marker='o', linestyle='-', color='red', label='Max Temp')
+            ax.plot(dates, temps_min, marker='o', linestyle='-', color='yellow', label='Min Temp')
+            if normals is not None:
+                # p10-p90 normal ranges for these calendar days, from the precomputed climatology
+                forecast_days = np.array(dates, dtype='datetime64[D]')
+                for field, color in (("max_temp", "#ff9999"), ("min_temp", "#fff4a3")):
+                    band = normals.band(field, forecast_days)
+                    if not np.isnan(band["p50"]).all():
+                        ax.fill_between(range(len(dates)), band["p10"], band["p90"], color=color, alpha=0.3,
+                                        label=f"Normal {field.replace('_temp', '')} (p10-p90)")
+            ax.set_ylabel("Temperature (°F)")
+            ax.set_title(f"{num_forecast_days}-Day Temperature Trend for {selected_city_name}", pad=20, fontsize=16, fontweight='bold')
+            ax.set_xticks(range(len(dates)))
+            ax.set_xticklabels(dates, rotation=45, ha='right')
+            ax.legend()
+        elif chart_type == "anomaly":
+            if normals is None or not self._plot_anomaly_chart(ax, dates, temps, normals):
+                plt.close(fig)
+                tk.Label(self.graph_frame, text=f"No historical normals for {selected_city_name} yet.", fg="red").pack()
+                return
+            ax.set_title(f"{num_forecast_days}-Day Forecast vs Normal for {selected_city_name}", pad=20, fontsize=16, fontweight='bold')
+
+        plt.tight_layout()
+        canvas = FigureCanvasTkAgg(fig, master=self.graph_frame)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+        plt.close(fig)
+
+    def _plot_anomaly_chart(self, ax, dates, temps, normals):
+        """
+        Plots each forecast day's average temperature as a departure from the stored normal for
+        that calendar day, labelled with its percentile rank in the city's history. Both come
+        from the climatology's day-of-year index, one array lookup per day.
+        Returns False when there is no normal for any of the days.
+        """
+        forecast_days = np.array(dates, dtype='datetime64[D]')
+        departures = normals.departure("avg_temp", forecast_days, temps)
+        ranks = normals.percentile_rank("avg_temp", forecast_days, temps)
+        if np.isnan(departures).all():
+            return False
+
+        x = range(len(dates))
+        colors = ['#d62728' if departure > 0 else '#1f77b4' for departure in departures]
+        bars = ax.bar(x, np.nan_to_num(departures), color=colors)
+        ax.axhline(0, color='white', linewidth=1)
+        for bar, departure, rank in zip(bars, departures, ranks):
+            label = "n/a" if np.isnan(departure) else f"{departure:+.1f}°F\np{rank:.0f}"
+            height = bar.get_height()
+            ax.annotate(label, xy=(bar.get_x() + bar.get_width() / 2, height),
+                        xytext=(0, 3 if height >= 0 else -3), textcoords="offset points",
+                        ha='center', va='bottom' if height >= 0 else 'top', fontsize=9, color='white')
+        ax.set_ylabel("Departure from Normal Avg Temp (°F)")
+        ax.set_xticks(list(x))
+        ax.set_xticklabels(dates, rotation=45, ha='right')
+        ax.margins(y=0.2)
+        return True
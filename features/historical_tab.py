@@ -3,14 +3,15 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
+import numpy as np
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from collections import defaultdict
-import csv
-import os
 
 from features.config import STATE_CITY_DATA
-from features.api import fetch_historical_daily_data
-from features.csv_files import HISTORY_DIR, create_historical_data_csv
+from features.csv_files import (has_history, load_climatology, load_daily_series, load_monthly_rollup, get_high_water_mark,
+                                get_history_gaps, sync_historical_data, verify_history)
+from features.rollups import monthly_means
+from features.aggregation import format_dates
+from features.background import BackgroundRunner, show_error, show_warning
 
 
 class HistoricalTab(ttk.Frame):
@@ -19,6 +20,7 @@ class HistoricalTab(ttk.Frame):
         self.parent_notebook = parent_notebook
         self.chart_data = {}
         self.chart_widgets = {}
+        self.runner = BackgroundRunner(self)  # Network calls and CSV I/O run off the Tk thread
         
         self.create_widgets()
 
@@ -65,7 +67,8 @@ class HistoricalTab(ttk.Frame):
         )
         self.city_dropdown.pack(side=tk.LEFT, padx=5)
 
-        self.state_dropdown.bind("<<ComboboxSelected>>", self.update_cities_dropdown)
+        self.state_dropdown.bind("<<ComboboxSelected>>", self._on_state_selected)
+        self.city_dropdown.bind("<<ComboboxSelected>>", self.cancel_pending)
         self.update_cities_dropdown()
 
         style = ttk.Style()
@@ -90,8 +93,12 @@ class HistoricalTab(ttk.Frame):
         self.graph_frame = tk.Frame(self)
         self.graph_frame.pack(pady=10, fill="both", expand=True)
 
-        self.status_label = ttk.Label(self, text="Ready.")
-        self.status_label.pack(pady=5)
+        status_frame = tk.Frame(self)
+        status_frame.pack(pady=5)
+        self.status_label = ttk.Label(status_frame, text="Ready.")
+        self.status_label.pack(side=tk.LEFT, padx=10)
+        self.progress = ttk.Progressbar(status_frame, mode="indeterminate", length=150)
+        self.progress.pack(side=tk.LEFT, padx=10)
 
         # Bind the window close event
         self.winfo_toplevel().protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -107,6 +114,10 @@ class HistoricalTab(ttk.Frame):
             # Destroy the main window
             self.winfo_toplevel().destroy()
 
+    def _on_state_selected(self, event=None):
+        self.update_cities_dropdown()
+        self.cancel_pending()
+
     def update_cities_dropdown(self, event=None):
         selected_state = self.state_var.get()
         cities_in_state = sorted(list(STATE_CITY_DATA.get(selected_state, {}).keys()))
@@ -130,116 +141,113 @@ class HistoricalTab(ttk.Frame):
         selected_state_name = self.state_var.get()
         selected_city_name = self.city_var.get()
 
-        self.status_label.config(text="Processing...")
-        self.get_chart_btn.config(state=tk.DISABLED)
-        self.winfo_toplevel().update_idletasks()
-
         if not selected_city_name:
             messagebox.showwarning("Selection Error", "Please select a city.")
-            self.status_label.config(text="Ready.")
-            self.get_chart_btn.config(state=tk.NORMAL)
             return
 
         city_info = STATE_CITY_DATA.get(selected_state_name, {}).get(selected_city_name)
         if not city_info:
             messagebox.showerror("Error", "City data not found.")
-            self.status_label.config(text="Ready.")
-            self.get_chart_btn.config(state=tk.NORMAL)
             return
 
-        lat = city_info["lat"]
-        lon = city_info["lon"]
-        timezone = city_info["timezone"]
-
-        filename = f"{selected_state_name.replace(' ', '_').lower()}_{selected_city_name.replace(' ', '_').lower()}_daily_weather_history.csv"
-        csv_filepath = os.path.join(HISTORY_DIR, filename)
-
-        all_daily_data = []
-
-        if not os.path.exists(csv_filepath) or os.path.getsize(csv_filepath) == 0:
-            messagebox.showinfo("Data Not Found", f"Historical data file not found for {selected_city_name}. Fetching data now...")
-            self.status_label.config(text=f"Fetching historical data for {selected_city_name}...")
-            self.winfo_toplevel().update_idletasks()
-            
-            # Using current date - 1 year to current date - 1 day
-            # Current date is July 28, 2025
-            import_start_date = datetime(2024, 7, 27).date() # One year before July 28, 2025
-            import_end_date = datetime.now().date() - timedelta(days=1)
-
-            if import_start_date > import_end_date:
-                messagebox.showwarning("Date Error", "The historical start date is after the end date. No data to fetch.")
-                self.status_label.config(text="Ready.")
-                self.get_chart_btn.config(state=tk.NORMAL)
-                return
-
-            import_start_date_str = import_start_date.isoformat()
-            import_end_date_str = import_end_date.isoformat()
-
-            historical_weather_data = fetch_historical_daily_data(lat, lon, timezone, import_start_date_str, import_end_date_str)
-
-            if historical_weather_data and 'daily' in historical_weather_data:
-                create_historical_data_csv(selected_state_name, selected_city_name, historical_weather_data, import_start_date_str, import_end_date_str, STATE_CITY_DATA)
-            else:
-                messagebox.showwarning("Import Failed", f"Could not fetch historical data for {selected_city_name}.")
-                self.status_label.config(text="Ready.")
-                self.get_chart_btn.config(state=tk.NORMAL)
-                return
-        
+        self._set_busy(True, "Processing...")
+        chart_type = self.chart_type.get()
+
+        # Fetching, saving and reading the CSV happen on a worker thread; a newer request
+        # (or a city change) cancels this one and its result is discarded.
+        self.runner.submit(
+            "chart", self._load_history_task, selected_state_name, selected_city_name, city_info, chart_type,
+            on_done=lambda data: self._on_history_loaded(data, selected_city_name, chart_type),
+            on_error=self._on_history_failed,
+            on_progress=lambda text: self.status_label.config(text=text)
+        )
+
+    def _load_history_task(self, task, selected_state_name, selected_city_name, city_info, chart_type):
+        """
+        Runs on a worker thread. Makes sure the city has stored history (fetching it if needed),
+        checks the file against its index checksum, and returns what the chart needs (the monthly
+        rollup, or the DailySeries and the city's climatology for the daily chart) with the number
+        of missing days in the history, or None when the data could not be obtained.
+        """
+        if not has_history(selected_state_name, selected_city_name):
+            task.report(f"Historical data file not found. Fetching historical data for {selected_city_name}...")
+            added = sync_historical_data(selected_state_name, selected_city_name, STATE_CITY_DATA)
+            if task.cancelled:
+                return None
+            if not added:
+                show_warning("Import Failed", f"Could not fetch historical data for {selected_city_name}.")
+                return None
+
+        task.report(f"Reading historical data for {selected_city_name}...")
+        verify_history(selected_state_name, selected_city_name)
+        gaps = get_history_gaps(selected_state_name, selected_city_name)
+        # The daily chart only shows the last 365 days, so only that range is read
+        start_date_str = None
+        if chart_type == "daily":
+            last_date = get_high_water_mark(selected_state_name, selected_city_name)
+            if last_date:
+                start_date_str = (last_date - timedelta(days=364)).isoformat()
         try:
-            with open(csv_filepath, 'r', newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    all_daily_data.append(row)
+            if chart_type == "monthly":
+                return load_monthly_rollup(selected_state_name, selected_city_name), gaps
+            series = load_daily_series(selected_state_name, selected_city_name, start_date_str)
+            return (series, load_climatology(selected_state_name, selected_city_name)), gaps
         except Exception as e:
-            messagebox.showerror("File Read Error", f"Failed to read data file: {e}")
-            self.status_label.config(text="Ready.")
-            self.get_chart_btn.config(state=tk.NORMAL)
-            return
+            show_error("File Read Error", f"Failed to read data file: {e}")
+            return None
 
-        chart_type = self.chart_type.get()
+    def _on_history_loaded(self, result, selected_city_name, chart_type):
+        if result is None:
+            self._set_busy(False, "Ready.")
+            return
+        data, gaps = result
 
         if chart_type == "monthly":
-            self.plot_monthly_chart(all_daily_data, selected_city_name)
+            self.plot_monthly_chart(data, selected_city_name)
         elif chart_type == "daily":
-            self.plot_daily_chart(all_daily_data, selected_city_name)
+            series, normals = data
+            self.plot_daily_chart(series, selected_city_name, normals)
         else:
             tk.Label(self.graph_frame, text="Invalid chart type selected.", fg="red").pack()
         
-        self.status_label.config(text=f"Displaying historical data for {selected_city_name}")
-        self.get_chart_btn.config(state=tk.NORMAL)
+        status_text = f"Displaying historical data for {selected_city_name}"
+        if gaps:
+            status_text += f" ({gaps} missing days in the stored history)"
+        self._set_busy(False, status_text)
+
+    def _on_history_failed(self, error):
+        messagebox.showerror("Error", f"An unexpected error occurred while loading historical data: {error}")
+        self._set_busy(False, "Ready.")
+
+    def cancel_pending(self, event=None):
+        """Drops an in-flight chart request for the previously selected city."""
+        if self.runner.is_running("chart"):
+            self.runner.cancel("chart")
+            self._set_busy(False, "Ready.")
+
+    def _set_busy(self, busy, status_text):
+        self.status_label.config(text=status_text)
+        if busy:
+            self.get_chart_btn.config(state=tk.DISABLED)
+            self.progress.start(10)
+        else:
+            self.get_chart_btn.config(state=tk.NORMAL)
+            self.progress.stop()
 
-    def plot_monthly_chart(self, all_daily_data, selected_city_name):
-        if not all_daily_data:
+    def plot_monthly_chart(self, monthly_rollup, selected_city_name):
+        if not monthly_rollup:
             tk.Label(self.graph_frame, text="No historical data to calculate monthly averages.", fg="red").pack()
             return
 
-        monthly_temps_sum = defaultdict(float)
-        monthly_temps_count = defaultdict(int)
-        min_date_loaded, max_date_loaded = datetime.max.date(), datetime.min.date()
-
-        for row in all_daily_data:
-            try:
-                date_obj = datetime.fromisoformat(row.get('Date')).date()
-                max_temp = float(row.get('Max Temperature (°F)'))
-                min_temp = float(row.get('Min Temperature (°F)'))
-            except (ValueError, TypeError, AttributeError):
-                continue
-
-            min_date_loaded = min(min_date_loaded, date_obj)
-            max_date_loaded = max(max_date_loaded, date_obj)
-            month_year = date_obj.strftime("%Y-%m")
-            daily_avg_temp = (max_temp + min_temp) / 2
-            monthly_temps_sum[month_year] += daily_avg_temp
-            monthly_temps_count[month_year] += 1
+        # Rendered straight from the precomputed monthly aggregates
+        months, avg_temps = monthly_means(monthly_rollup, "avg_temp")
 
-        monthly_averages = {my: monthly_temps_sum[my] / monthly_temps_count[my] for my in sorted(monthly_temps_sum) if monthly_temps_count[my] > 0}
-
-        if not monthly_averages:
+        if not months:
             tk.Label(self.graph_frame, text="No valid data to calculate monthly averages.", fg="red").pack()
             return
 
-        months = list(monthly_averages.keys())
-        avg_temps = list(monthly_averages.values())
+        min_date_loaded = datetime.strptime(months[0], "%Y-%m")
+        max_date_loaded = datetime.strptime(months[-1], "%Y-%m")
 
         fig, ax = plt.subplots(figsize=(12, 6))
         fig.patch.set_facecolor("#c8c8f3")
@@ -289,7 +297,7 @@ class HistoricalTab(ttk.Frame):
         visible_points = 14
         end_index = start_index + visible_points
         
-        visible_dates = dates[start_index:end_index]
+        visible_dates = dates[start_index:end_index]  # datetime64 slice, no copy
         visible_min_temps = min_temps[start_index:end_index]
         visible_max_temps = max_temps[start_index:end_index]
         visible_avg_temps = avg_temps[start_index:end_index]
@@ -302,64 +310,43 @@ class HistoricalTab(ttk.Frame):
         # Update x-axis limits and ticks
         ax.set_xlim(visible_dates[0], visible_dates[-1])
         ax.set_xticks(visible_dates)
-        ax.set_xticklabels([d.strftime('%Y-%m-%d') for d in visible_dates], rotation=45, ha='right')
+        ax.set_xticklabels(format_dates(visible_dates), rotation=45, ha='right')
         
         # Keep y-axis limits consistent
         ax.set_ylim(y_limits)
         
         # Update title (if it contains dynamic date range for daily view)
-        ax.set_title(f"Daily Temperatures for {city_name}\n({visible_dates[0].strftime('%b %d, %Y')} to {visible_dates[-1].strftime('%b %d, %Y')})", pad=20)
+        first_day, last_day = visible_dates[0].item(), visible_dates[-1].item()
+        ax.set_title(f"Daily Temperatures for {city_name}\n({first_day.strftime('%b %d, %Y')} to {last_day.strftime('%b %d, %Y')})", pad=20)
         
         # Redraw only the canvas
         canvas.draw()
 
-    def plot_daily_chart(self, all_daily_data, selected_city_name):
-        if not all_daily_data:
-            tk.Label(self.graph_frame, text="No historical data for daily chart.", fg="red").pack()
-            return
-
-        daily_data = []
-        # Filter data to include only the last 365 days from the latest available date
-        # First, find the latest date in all_daily_data
-        latest_date = None
-        for row in all_daily_data:
-            try:
-                date_obj = datetime.fromisoformat(row.get('Date')).date()
-                if latest_date is None or date_obj > latest_date:
-                    latest_date = date_obj
-            except (ValueError, TypeError, AttributeError):
-                continue
-        
-        if latest_date:
-            # Calculate the start date for the last 365 days relative to the latest date
-            start_date_365_days_ago = latest_date - timedelta(days=364) # inclusive of latest date
-            
-            for row in all_daily_data:
-                try:
-                    date_obj = datetime.fromisoformat(row.get('Date')).date()
-                    max_temp = float(row.get('Max Temperature (°F)'))
-                    min_temp = float(row.get('Min Temperature (°F)'))
-                    daily_avg_temp = (max_temp + min_temp) / 2
-                    
-                    if date_obj >= start_date_365_days_ago and date_obj <= latest_date:
-                        daily_data.append((date_obj, daily_avg_temp, min_temp, max_temp))
-                except (ValueError, TypeError, AttributeError):
-                    continue
-        
-        if not daily_data:
+    def plot_daily_chart(self, series, selected_city_name, normals=None):
+        # Only the last 365 days up to the latest available date are shown
+        daily_series = series.last_days(365)
+        if not len(daily_series):
             tk.Label(self.graph_frame, text="No valid daily data to display.", fg="red").pack()
             return
-            
-        daily_data = sorted(daily_data, key=lambda item: item[0])
-        self.chart_data['dates'] = [item[0] for item in daily_data]
-        self.chart_data['temps'] = [item[1] for item in daily_data]
-        self.chart_data['min_temps'] = [item[2] for item in daily_data]
-        self.chart_data['max_temps'] = [item[3] for item in daily_data]
+
+        self.chart_data['dates'] = daily_series.dates
+        self.chart_data['temps'] = daily_series.avg_temp
+        self.chart_data['min_temps'] = daily_series.min_temp
+        self.chart_data['max_temps'] = daily_series.max_temp
         self.chart_data['city_name'] = selected_city_name
 
+        # Normal range of the daily average for each calendar day, looked up from the
+        # precomputed climatology (nothing is recomputed here)
+        band = normals.band("avg_temp", daily_series.dates) if normals is not None else None
+        if band is not None and np.isnan(band["p50"]).all():
+            band = None
+
         padding = 5
-        global_min_temp = min(self.chart_data['min_temps']) - padding
-        global_max_temp = max(self.chart_data['max_temps']) + padding
+        global_min_temp = float(self.chart_data['min_temps'].min()) - padding
+        global_max_temp = float(self.chart_data['max_temps'].max()) + padding
+        if band is not None:
+            global_min_temp = min(global_min_temp, float(np.nanmin(band["p10"])) - padding)
+            global_max_temp = max(global_max_temp, float(np.nanmax(band["p90"])) + padding)
         self.chart_data['y_limits'] = (global_min_temp, global_max_temp)
 
         fig, ax = plt.subplots(figsize=(11, 6))
@@ -383,7 +370,13 @@ class HistoricalTab(ttk.Frame):
         self.chart_widgets['line'] = line
         self.chart_widgets['min_line'] = min_line
         self.chart_widgets['max_line'] = max_line
-        
+
+        if band is not None:
+            # Drawn once for the whole year; scrolling only moves the x-limits over it
+            ax.fill_between(daily_series.dates, band["p10"], band["p90"], color='#9e9e9e', alpha=0.25,
+                            label='Normal range (p10-p90)')
+            ax.plot(daily_series.dates, band["p50"], color='#555555', linestyle=':', linewidth=1, label='Normal (median)')
+
         ax.legend()
         
         num_dates = len(self.chart_data['dates'])
@@ -0,0 +1,148 @@
+# features/history_db.py
+import csv
+import glob
+import os
+import sqlite3
+import threading
+
+from features.config import HISTORY_DB_PATH, STATE_CITY_DATA
+
+# CSV field -> database column, in CSV order
+CSV_TO_DB_COLUMNS = {
+    "Date": "date",
+    "Max Temperature (°F)": "max_temp",
+    "Min Temperature (°F)": "min_temp",
+    "Precipitation (inch)": "precip",
+    "Max Wind Speed (mph)": "max_wind",
+    "Weather Description": "description",
+    "Sunrise (UTC)": "sunrise",
+    "Sunset (UTC)": "sunset",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_history (
+    state       TEXT NOT NULL,
+    city        TEXT NOT NULL,
+    date        TEXT NOT NULL,   -- ISO YYYY-MM-DD, sorts chronologically
+    max_temp    REAL,
+    min_temp    REAL,
+    precip      REAL,
+    max_wind    REAL,
+    description TEXT,
+    sunrise     TEXT,
+    sunset      TEXT,
+    PRIMARY KEY (state, city, date)
+) WITHOUT ROWID;
+"""
+
+_UPSERT = """
+INSERT INTO daily_history (state, city, date, max_temp, min_temp, precip, max_wind, description, sunrise, sunset)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (state, city, date) DO UPDATE SET
+    max_temp = excluded.max_temp, min_temp = excluded.min_temp, precip = excluded.precip,
+    max_wind = excluded.max_wind, description = excluded.description,
+    sunrise = excluded.sunrise, sunset = excluded.sunset
+"""
+
+# SQLite connections cannot be shared between threads, and the app writes from worker threads
+_local = threading.local()
+
+
+def get_connection(db_path=None):
+    """Returns this thread's connection to the history database, creating the schema on first use."""
+    db_path = db_path or HISTORY_DB_PATH
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")   # Readers do not block the writer
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+def upsert_rows(state_name, city_name, rows, db_path=None):
+    """
+    Inserts or updates daily rows (dicts keyed by the CSV field names). The (state, city, date)
+    primary key de-duplicates, so no existing dates have to be read first.
+
+    Returns:
+        int: Number of rows written.
+    """
+    params = [
+        (state_name, city_name) + tuple(row[field] for field in CSV_TO_DB_COLUMNS)
+        for row in rows
+    ]
+    if not params:
+        return 0
+    conn = get_connection(db_path)
+    with conn:
+        conn.executemany(_UPSERT, params)
+    return len(params)
+
+
+def query_range(state_name, city_name, start_date_str=None, end_date_str=None, db_path=None):
+    """
+    Returns a city's rows between start and end (inclusive, either may be None), oldest first,
+    as dicts keyed by the CSV field names. Only the requested range is read, via the primary key.
+    """
+    sql = "SELECT date, max_temp, min_temp, precip, max_wind, description, sunrise, sunset " \
+          "FROM daily_history WHERE state = ? AND city = ?"
+    params = [state_name, city_name]
+    if start_date_str:
+        sql += " AND date >= ?"
+        params.append(start_date_str)
+    if end_date_str:
+        sql += " AND date <= ?"
+        params.append(end_date_str)
+    sql += " ORDER BY date"
+    fields = list(CSV_TO_DB_COLUMNS)
+    return [dict(zip(fields, record)) for record in get_connection(db_path).execute(sql, params)]
+
+
+def get_date_bounds(state_name, city_name, db_path=None):
+    """Returns (first_date_str, last_date_str) for a city, or (None, None) when it has no rows."""
+    return get_connection(db_path).execute(
+        "SELECT MIN(date), MAX(date) FROM daily_history WHERE state = ? AND city = ?",
+        (state_name, city_name)
+    ).fetchone()
+
+
+def get_last_date_str(state_name, city_name, db_path=None):
+    return get_date_bounds(state_name, city_name, db_path)[1]
+
+
+def import_csv_histories(history_dir="historical_data", db_path=None):
+    """
+    One-shot import of every *_daily_weather_history.csv into the database.
+    File names are matched back to STATE_CITY_DATA to recover the state and city.
+
+    Returns:
+        int: Number of rows imported.
+    """
+    from features.csv_files import history_csv_path
+
+    by_filename = {}
+    for state_name, cities in STATE_CITY_DATA.items():
+        for city_name in cities:
+            by_filename[os.path.basename(history_csv_path(state_name, city_name))] = (state_name, city_name)
+
+    total = 0
+    for csv_filepath in sorted(glob.glob(os.path.join(history_dir, "*_daily_weather_history.csv"))):
+        location = by_filename.get(os.path.basename(csv_filepath))
+        if location is None:
+            print(f"Skipping {csv_filepath}: no matching city in STATE_CITY_DATA")
+            continue
+        with open(csv_filepath, 'r', newline='', encoding='utf-8') as f:
+            total += upsert_rows(*location, csv.DictReader(f), db_path=db_path)
+    print(f"Imported {total} rows into {db_path or HISTORY_DB_PATH}")
+    return total
+
+
+if __name__ == "__main__":
+    # python -m features.history_db
+    import_csv_histories()
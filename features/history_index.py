@@ -0,0 +1,182 @@
+# features/history_index.py
+import json
+import os
+import zlib
+from datetime import date
+
+# Sidecar index kept next to each history CSV (<file>.idx.json). It records the date range,
+# row count, the byte offset of the first row of every month and a running CRC-32 of the
+# file, so the latest day, de-duplication, gap checks and range reads do not scan the CSV.
+INDEX_VERSION = 1
+
+
+def index_path(csv_filepath):
+    return os.path.splitext(csv_filepath)[0] + ".idx.json"
+
+
+def _empty_index():
+    return {
+        "version": INDEX_VERSION,
+        "size": 0,            # Bytes covered by the index
+        "mtime_ns": 0,
+        "header_size": 0,
+        "rows": 0,
+        "min_date": None,
+        "max_date": None,
+        "gaps": 0,            # Missing days between consecutive rows
+        "ordered": True,      # False if a row was not after the previous one
+        "months": {},         # "YYYY-MM" -> byte offset of the month's first row
+        "last_row_offset": 0,
+        "last_row_crc32": 0,
+        "crc32": 0,
+    }
+
+
+def _extend(index, data, offset):
+    """Adds the rows in data (bytes that start at file offset `offset`) to the index."""
+    index["crc32"] = zlib.crc32(data, index["crc32"])
+    position = 0
+    previous = date.fromisoformat(index["max_date"]) if index["max_date"] else None
+    while position < len(data):
+        end = data.find(b"\n", position)
+        end = len(data) if end == -1 else end + 1
+        line = data[position:end]
+        row_offset = offset + position
+        position = end
+        if row_offset < index["header_size"] or not line.strip():
+            continue
+        try:
+            row_date = date.fromisoformat(line.split(b",", 1)[0].decode("utf-8").strip())
+        except ValueError:
+            continue  # Not a data row
+        if previous is not None:
+            if row_date <= previous:
+                index["ordered"] = False
+            else:
+                index["gaps"] += (row_date - previous).days - 1
+        month = row_date.isoformat()[:7]
+        index["months"].setdefault(month, row_offset)
+        if index["min_date"] is None or row_date.isoformat() < index["min_date"]:
+            index["min_date"] = row_date.isoformat()
+        if previous is None or row_date > previous:
+            index["max_date"] = row_date.isoformat()
+            previous = row_date
+        index["rows"] += 1
+        index["last_row_offset"] = row_offset
+        index["last_row_crc32"] = zlib.crc32(line)
+    index["size"] = offset + len(data)
+
+
+def _save(csv_filepath, index):
+    index["mtime_ns"] = os.stat(csv_filepath).st_mtime_ns
+    tmp_path = index_path(csv_filepath) + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path(csv_filepath))
+    except OSError as e:
+        print(f"Warning: Could not write index for {csv_filepath}: {e}")
+
+
+def _load(csv_filepath):
+    try:
+        with open(index_path(csv_filepath), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return index if index.get("version") == INDEX_VERSION else None
+
+
+def build_index(csv_filepath):
+    """Scans the whole CSV once and writes a fresh index for it."""
+    index = _empty_index()
+    with open(csv_filepath, 'rb') as f:
+        header = f.readline()
+        index["header_size"] = len(header)
+        index["crc32"] = zlib.crc32(header)
+        index["size"] = len(header)
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            # Keep whole lines together so every row is parsed from one piece
+            chunk += f.readline()
+            _extend(index, chunk, index["size"])
+    _save(csv_filepath, index)
+    return index
+
+
+def _tail_matches(f, index):
+    """Checks that the last indexed row is still where the index says it is."""
+    if not index["rows"]:
+        return True
+    f.seek(index["last_row_offset"])
+    return zlib.crc32(f.readline()) == index["last_row_crc32"]
+
+
+def get_index(csv_filepath):
+    """
+    Returns the CSV's index, or None when the file does not exist.
+
+    The index is trusted when the file's size and mtime match. If the file only grew and its
+    last indexed row is unchanged, just the new tail is read; otherwise the index is rebuilt.
+    """
+    try:
+        stat = os.stat(csv_filepath)
+    except OSError:
+        return None
+    index = _load(csv_filepath)
+    if index is not None and index["size"] == stat.st_size and index["mtime_ns"] == stat.st_mtime_ns:
+        return index
+    if index is not None and 0 < index["size"] < stat.st_size:
+        with open(csv_filepath, 'rb') as f:
+            if _tail_matches(f, index):
+                f.seek(index["size"])
+                _extend(index, f.read(), index["size"])
+                _save(csv_filepath, index)
+                return index
+    return build_index(csv_filepath)
+
+
+def note_write(csv_filepath, offset, data):
+    """
+    Updates the index after `data` was written at `offset` (0 for a new file, including its header)
+    without reading the file back. Falls back to get_index when the index does not line up.
+    """
+    if offset == 0:
+        index = _empty_index()
+        header_end = data.find(b"\n") + 1
+        index["header_size"] = header_end
+        index["crc32"] = zlib.crc32(data[:header_end])
+        _extend(index, data[header_end:], header_end)
+    else:
+        index = _load(csv_filepath)
+        if index is None or index["size"] != offset:
+            return get_index(csv_filepath)
+        _extend(index, data, offset)
+    _save(csv_filepath, index)
+    return index
+
+
+def offset_for_date(index, date_str):
+    """Byte offset to start reading from for rows on or after date_str (the start of its month)."""
+    month = date_str[:7]
+    for candidate in sorted(index["months"]):
+        if candidate >= month:
+            return index["months"][candidate]
+    return index["size"]
+
+
+def verify_index(csv_filepath):
+    """Recomputes the CRC-32 of the whole file and compares it with the index's checksum."""
+    index = get_index(csv_filepath)
+    if index is None:
+        return False
+    crc = 0
+    with open(csv_filepath, 'rb') as f:
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+    return crc == index["crc32"]
@@ -0,0 +1,188 @@
+# features/history_store.py
+import csv
+import glob
+import json
+import os
+import shutil
+
+import numpy as np
+
+from features import file_lock, history_index
+from features.aggregation import window_slice
+from features.config import OM_WEATHER_CODES
+
+# Columnar copy of each history CSV: one typed .npy file per column in
+# historical_data/columnar/<state>_<city>_daily_weather_history/, plus meta.json recording the
+# CSV checksum and size (from the sidecar index) the columns were written for. Loading a city
+# memory-maps the columns, so no text is parsed; when the CSV no longer matches, the columns
+# are rebuilt from it.
+COLUMNAR_SUBDIR = "columnar"
+COLUMNAR_VERSION = 1
+
+# Column name -> (CSV field, numpy dtype)
+COLUMNS = {
+    "date": ("Date", "datetime64[D]"),
+    "max_temp": ("Max Temperature (°F)", "float32"),
+    "min_temp": ("Min Temperature (°F)", "float32"),
+    "precip": ("Precipitation (inch)", "float32"),
+    "max_wind": ("Max Wind Speed (mph)", "float32"),
+    "weather_code": ("Weather Description", "int16"),
+    "sunrise": ("Sunrise (UTC)", "datetime64[m]"),
+    "sunset": ("Sunset (UTC)", "datetime64[m]"),
+}
+
+# The CSV stores the description text; the columnar store keeps the Open-Meteo code
+_DESCRIPTION_TO_CODE = {description: code for code, description in OM_WEATHER_CODES.items()}
+
+
+def columnar_dir_for_csv(csv_filepath):
+    base = os.path.splitext(os.path.basename(csv_filepath))[0]
+    return os.path.join(os.path.dirname(csv_filepath), COLUMNAR_SUBDIR, base)
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def rows_to_columns(rows):
+    """
+    Converts CSV row dicts into typed column arrays in date order (one pass, no per-row
+    objects kept). Rows without a valid date or both temperatures are skipped.
+    """
+    values = {name: [] for name in COLUMNS}
+    for row in rows:
+        try:
+            day = np.datetime64(row["Date"], "D")
+            max_temp = float(row["Max Temperature (°F)"])
+            min_temp = float(row["Min Temperature (°F)"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if np.isnat(day) or np.isnan(max_temp) or np.isnan(min_temp):
+            continue
+        values["date"].append(day)
+        values["max_temp"].append(max_temp)
+        values["min_temp"].append(min_temp)
+        values["precip"].append(_to_float(row.get("Precipitation (inch)")))
+        values["max_wind"].append(_to_float(row.get("Max Wind Speed (mph)")))
+        values["weather_code"].append(_DESCRIPTION_TO_CODE.get(row.get("Weather Description"), -1))
+        values["sunrise"].append(row.get("Sunrise (UTC)") or "NaT")
+        values["sunset"].append(row.get("Sunset (UTC)") or "NaT")
+    columns = {name: np.array(values[name], dtype=dtype) for name, (_, dtype) in COLUMNS.items()}
+    dates = columns["date"]
+    if len(dates) > 1 and not (dates[1:] >= dates[:-1]).all():
+        order = np.argsort(dates, kind="stable")
+        columns = {name: column[order] for name, column in columns.items()}
+    return columns
+
+
+def _load_meta(csv_filepath):
+    try:
+        with open(os.path.join(columnar_dir_for_csv(csv_filepath), "meta.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == COLUMNAR_VERSION else None
+
+
+def _meta_matches(meta, index):
+    return meta is not None and index is not None and meta["crc32"] == index["crc32"] and meta["size"] == index["size"]
+
+
+def _write_columns(csv_filepath, columns, index):
+    """Writes column arrays next to the CSV, replacing any previous copy in one rename."""
+    target_dir = columnar_dir_for_csv(csv_filepath)
+    tmp_dir = target_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name in COLUMNS:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), columns[name])
+    with open(os.path.join(tmp_dir, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump({"version": COLUMNAR_VERSION, "rows": int(len(columns["date"])),
+                   "crc32": index["crc32"], "size": index["size"]}, f)
+    shutil.rmtree(target_dir, ignore_errors=True)
+    os.replace(tmp_dir, target_dir)
+
+
+def build_from_csv(csv_filepath):
+    """Writes the columnar copy of a CSV from scratch. Returns the row count."""
+    with file_lock.locked(csv_filepath):
+        index = history_index.get_index(csv_filepath)
+        with open(csv_filepath, 'r', newline='', encoding='utf-8') as f:
+            columns = rows_to_columns(csv.DictReader(f))
+        _write_columns(csv_filepath, columns, index)
+    return len(columns["date"])
+
+
+def append_rows(csv_filepath, rows, checksum_before):
+    """
+    Adds the days in rows that are after the last stored day to the columnar copy. When the
+    copy did not match the CSV as it was before the append (checksum_before), it is rebuilt
+    from the CSV instead.
+
+    Returns:
+        int: Number of days added.
+    """
+    with file_lock.locked(csv_filepath):
+        meta = _load_meta(csv_filepath)
+        if checksum_before is None or meta is None or meta["crc32"] != checksum_before:
+            return build_from_csv(csv_filepath)
+        target_dir = columnar_dir_for_csv(csv_filepath)
+        stored = {name: np.load(os.path.join(target_dir, f"{name}.npy")) for name in COLUMNS}
+        new = rows_to_columns(rows)
+        if len(stored["date"]):
+            keep = new["date"] > stored["date"][-1]
+            new = {name: column[keep] for name, column in new.items()}
+        merged = {name: np.concatenate([stored[name], new[name]]) for name in COLUMNS}
+        _write_columns(csv_filepath, merged, history_index.get_index(csv_filepath))
+        return len(new["date"])
+
+
+def remove_columns(csv_filepath):
+    """Deletes the columnar copy, e.g. after the CSV was rewritten; it is rebuilt on next use."""
+    shutil.rmtree(columnar_dir_for_csv(csv_filepath), ignore_errors=True)
+
+
+def load_columns(csv_filepath):
+    """
+    Returns a CSV's history as a dict of typed column arrays memory-mapped from the .npy files.
+    The copy is rebuilt first when it is missing or its meta does not match the CSV's current
+    checksum and size (e.g. the CSV was edited outside the app). Returns None when the CSV
+    does not exist.
+    """
+    with file_lock.locked(csv_filepath):
+        index = history_index.get_index(csv_filepath)
+        if index is None:
+            return None
+        if not _meta_matches(_load_meta(csv_filepath), index):
+            build_from_csv(csv_filepath)
+        target_dir = columnar_dir_for_csv(csv_filepath)
+        return {name: np.load(os.path.join(target_dir, f"{name}.npy"), mmap_mode='r') for name in COLUMNS}
+
+
+def window(columns, start_date=None, end_date=None):
+    """Returns the days from start_date to end_date inclusive as views of the columns (binary search, no copy)."""
+    if columns is None:
+        return None
+    selector = window_slice(columns["date"], start_date, end_date)
+    return {name: column[selector] for name, column in columns.items()}
+
+
+def migrate_csv_histories(history_dir="historical_data"):
+    """One-shot: writes the columnar copy of every *_daily_weather_history.csv. Returns the file count."""
+    migrated = 0
+    for csv_filepath in sorted(glob.glob(os.path.join(history_dir, "*_daily_weather_history.csv"))):
+        try:
+            build_from_csv(csv_filepath)
+            migrated += 1
+        except (OSError, ValueError) as e:
+            print(f"Skipping {csv_filepath}: {e}")
+    print(f"Migrated {migrated} history files to {os.path.join(history_dir, COLUMNAR_SUBDIR)}")
+    return migrated
+
+
+if __name__ == "__main__":
+    # python -m features.history_store
+    migrate_csv_histories()
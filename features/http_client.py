@@ -0,0 +1,184 @@
+# features/http_client.py
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from features.rate_limit import acquire_for_url
+
+# Connect / read timeouts in seconds. The archive endpoint can take a while
+# to build a long daily series, so the read timeout is the more generous one.
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+
+# Retry policy: jittered exponential backoff on connection errors, timeouts
+# and retryable status codes (rate limiting and transient server errors).
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5   # seconds, doubled on every attempt
+BACKOFF_MAX = 8.0    # seconds, cap on a single sleep
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Keep-alive pool sizing (per host).
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+
+# Global cap on requests in flight at once, across every fetcher and worker thread.
+MAX_CONCURRENT_REQUESTS = 4
+_request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+_session = None
+_session_lock = threading.Lock()
+
+# Optional stand-in for the session (see features/replay.py). Anything with a
+# requests-compatible get(url, params=..., timeout=...) method can be installed.
+_transport = None
+
+_stats_lock = threading.Lock()
+_latency_stats = defaultdict(lambda: {"count": 0, "errors": 0, "retries": 0,
+                                      "total_ms": 0.0, "min_ms": None, "max_ms": 0.0,
+                                      "last_ms": 0.0})
+
+
+def get_session():
+    """
+    Returns the shared requests.Session used by every fetcher.
+    The session keeps connections alive so repeat calls to the same host
+    skip the TCP/TLS handshake.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def close_session():
+    """Closes the shared session and its pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def set_transport(transport):
+    """Routes every request through transport instead of the shared session (None restores the session)."""
+    global _transport
+    _transport = transport
+
+
+def get_transport():
+    """Returns the object requests are sent through: the installed transport or the shared session."""
+    return _transport if _transport is not None else get_session()
+
+
+def _backoff_delay(attempt):
+    """Full-jitter exponential backoff: random sleep in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _record_latency(host, elapsed_ms, retries, failed):
+    with _stats_lock:
+        stats = _latency_stats[host]
+        stats["count"] += 1
+        stats["retries"] += retries
+        if failed:
+            stats["errors"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["last_ms"] = elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["min_ms"] = elapsed_ms if stats["min_ms"] is None else min(stats["min_ms"], elapsed_ms)
+
+
+def get_latency_stats():
+    """
+    Returns a snapshot of per-host request latency statistics. A request's latency is the
+    time spent in the transport's get() over all its attempts; waits for the rate limiter,
+    a request slot and retry backoff are not included.
+
+    Returns:
+        dict: host -> {count, errors, retries, total_ms, min_ms, max_ms, last_ms, avg_ms}
+    """
+    with _stats_lock:
+        snapshot = {}
+        for host, stats in _latency_stats.items():
+            entry = dict(stats)
+            entry["avg_ms"] = entry["total_ms"] / entry["count"] if entry["count"] else 0.0
+            snapshot[host] = entry
+        return snapshot
+
+
+def reset_latency_stats():
+    """Clears the collected latency statistics."""
+    with _stats_lock:
+        _latency_stats.clear()
+
+
+def get_json(url, params=None, timeout=None, max_retries=MAX_RETRIES):
+    """
+    Performs a GET request through the shared session and returns the decoded JSON body.
+
+    Connection errors, timeouts and retryable status codes are retried with
+    jittered exponential backoff. Other HTTP errors are raised immediately.
+    At most MAX_CONCURRENT_REQUESTS requests are on the wire at once; backoff sleeps
+    do not hold a slot. Every attempt (including retries) first waits for a token from
+    the provider's rate limiter, so callers queue instead of tripping the quota; stand-in
+    transports that declare rate_limited = False (e.g. replay) skip the limiter.
+
+    Args:
+        url (str): The endpoint URL.
+        params (dict): Query parameters.
+        timeout (tuple): (connect, read) timeout in seconds.
+        max_retries (int): Number of retries after the first attempt.
+
+    Raises:
+        requests.exceptions.RequestException: When the request still fails after all retries.
+        ValueError: When the response body is not valid JSON.
+    """
+    if timeout is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    host = urlparse(url).netloc
+    session = get_transport()
+
+    attempt = 0
+    elapsed = 0.0  # Time on the wire only: limiter, slot and backoff waits are not latency
+    while True:
+        try:
+            if getattr(session, "rate_limited", True):
+                acquire_for_url(url)
+            with _request_slots:
+                sent = time.perf_counter()
+                try:
+                    response = session.get(url, params=params, timeout=timeout)
+                finally:
+                    elapsed += time.perf_counter() - sent
+            if response.status_code in RETRY_STATUS_CODES and attempt < max_retries:
+                retry_after = response.headers.get("Retry-After")
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else _backoff_delay(attempt)
+                response.close()
+                attempt += 1
+                time.sleep(min(delay, BACKOFF_MAX))
+                continue
+            response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt < max_retries:
+                time.sleep(_backoff_delay(attempt))
+                attempt += 1
+                continue
+            _record_latency(host, elapsed * 1000, attempt, True)
+            raise
+        except Exception:
+            _record_latency(host, elapsed * 1000, attempt, True)
+            raise
+        _record_latency(host, elapsed * 1000, attempt, False)
+        return data
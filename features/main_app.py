@@ -3,6 +3,10 @@ import tkinter.ttk as ttk
 from features.forecast_tab import ForecastTab
 from features.historical_tab import HistoricalTab
 from features.team_tab import TeamTab
+from features.http_client import close_session
+from features.background import BackgroundRunner
+from features.config import STATE_CITY_DATA, WARMUP_ON_STARTUP, WARMUP_DELAY_MS
+from features.prefetch import warm_up_histories
 import matplotlib.pyplot as plt
 
 
@@ -36,6 +40,10 @@ class WeatherDashboardApp:
         )
         # --- End Notebook Tabs Styling ---
 
+        # --- Application status bar (used by the background warm-up) ---
+        self.status_bar = ttk.Label(master, text="Ready.", anchor="w", relief="sunken")
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+
         self.notebook = ttk.Notebook(master)
         self.notebook.pack(expand=True, fill="both")
 
@@ -47,8 +55,32 @@ class WeatherDashboardApp:
         self.notebook.add(self.historical_tab, text=" Historical Data ")
         self.notebook.add(self.team_tab, text=" Team Data ")
 
+        # Optionally refresh every city's history in the background once the window is idle
+        self.runner = BackgroundRunner(master)
+        if WARMUP_ON_STARTUP:
+            master.after(WARMUP_DELAY_MS, self.start_history_warm_up)
+
+    def start_history_warm_up(self):
+        """Refreshes stale or missing history CSVs for all cities on a bounded worker pool."""
+        self.status_bar.config(text="Checking historical data...")
+        self.runner.submit(
+            "warm_up",
+            lambda task: warm_up_histories(STATE_CITY_DATA, on_progress=task.report, is_cancelled=lambda: task.cancelled),
+            on_done=lambda summary: None,
+            on_error=lambda e: self.status_bar.config(text=f"Historical data warm-up failed: {e}"),
+            on_progress=lambda text: self.status_bar.config(text=text)
+        )
+
+    def cleanup(self):
+        # Stop background workers and release pooled HTTP connections
+        self.runner.shutdown()
+        self.forecast_tab.runner.shutdown()
+        self.historical_tab.runner.shutdown()
+        close_session()
+
     def on_closing(self):
         plt.close('all')
+        self.cleanup()
         self.master.destroy()
 
 if __name__ == "__main__":
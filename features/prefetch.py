@@ -0,0 +1,83 @@
+# features/prefetch.py
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from features.config import iter_city_entries, WARMUP_MAX_WORKERS
+from features.csv_files import is_history_stale, refresh_all_city_histories, sync_historical_data
+
+
+def find_stale_histories(state_city_data):
+    """
+    Walks STATE_CITY_DATA and returns the (state_name, city_name) pairs whose
+    historical_data CSV is missing or out of date.
+    """
+    stale = []
+    for state_name, city_info in iter_city_entries(state_city_data):
+        if is_history_stale(state_name, city_info["name"]):
+            stale.append((state_name, city_info["name"]))
+    return stale
+
+
+def warm_up_histories(state_city_data, max_workers=WARMUP_MAX_WORKERS, on_progress=None, is_cancelled=None):
+    """
+    Refreshes every stale or missing city history, so the first chart for each city is read
+    from disk instead of waiting for a full archive download. The stale cities are first
+    fetched together with batched requests (refresh_all_city_histories); cities the batch
+    could not cover (long ranges, failed batches) are then synced one by one on a bounded
+    worker pool. Requests also go through the global concurrency cap in http_client.
+
+    Args:
+        state_city_data (dict): STATE_CITY_DATA.
+        max_workers (int): Number of cities refreshed in parallel.
+        on_progress (callable): Called with a status string after each city.
+        is_cancelled (callable): Returns True to stop scheduling further cities.
+
+    Returns:
+        dict: {"checked": n, "updated": n, "failed": [(state, city), ...]}
+    """
+    stale = find_stale_histories(state_city_data)
+    summary = {"checked": len(stale), "updated": 0, "failed": []}
+    if not stale:
+        if on_progress:
+            on_progress("Historical data is up to date.")
+        return summary
+
+    if on_progress:
+        on_progress(f"Warming up historical data for {len(stale)} cities...")
+    try:
+        batched = refresh_all_city_histories(state_city_data, cities=stale)
+    except Exception as e:
+        print(f"Batched warm-up failed: {e}")
+        batched = {}
+    summary["updated"] += sum(1 for added in batched.values() if added)
+    remaining = [city for city in stale if batched.get(city) is None]
+
+    def refresh(state_name, city_name):
+        if is_cancelled and is_cancelled():
+            return None
+        return sync_historical_data(state_name, city_name, state_city_data, show_errors=False)
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather-warmup") as executor:
+        futures = {executor.submit(refresh, state_name, city_name): (state_name, city_name)
+                   for state_name, city_name in remaining}
+        for future in as_completed(futures):
+            state_name, city_name = futures[future]
+            done += 1
+            try:
+                added = future.result()
+            except Exception as e:
+                print(f"Warm-up failed for {city_name}, {state_name}: {e}")
+                added = None
+            if added is None:
+                summary["failed"].append((state_name, city_name))
+            elif added:
+                summary["updated"] += 1
+            if on_progress:
+                on_progress(f"Warming up historical data: {done}/{len(remaining)} ({city_name})")
+
+    if on_progress:
+        message = f"Historical data warm-up finished: {summary['updated']} updated"
+        if summary["failed"]:
+            message += f", {len(summary['failed'])} failed"
+        on_progress(message + ".")
+    return summary
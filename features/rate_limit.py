@@ -0,0 +1,94 @@
+# features/rate_limit.py
+import threading
+import time
+from urllib.parse import urlparse
+
+from features.config import PROVIDER_RATE_LIMITS
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() blocks until a token is available, so callers
+    queue instead of failing, and the bucket tracks how long and how many callers waited.
+    """
+
+    def __init__(self, rate_per_second, capacity):
+        self.rate = float(rate_per_second)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiting = 0
+        self._stats = {"acquired": 0, "waited": 0, "total_wait_s": 0.0, "max_wait_s": 0.0, "max_queue_depth": 0}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Takes one token, waiting for the bucket to refill if it is empty. Returns the time waited in seconds."""
+        start = time.monotonic()
+        with self._cond:
+            self._refill()
+            if self._tokens < 1:
+                self._waiting += 1
+                self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._waiting)
+                try:
+                    while True:
+                        self._refill()
+                        if self._tokens >= 1:
+                            break
+                        self._cond.wait((1 - self._tokens) / self.rate)
+                finally:
+                    self._waiting -= 1
+            self._tokens -= 1
+            waited = time.monotonic() - start
+            self._stats["acquired"] += 1
+            if waited > 0.001:
+                self._stats["waited"] += 1
+                self._stats["total_wait_s"] += waited
+                self._stats["max_wait_s"] = max(self._stats["max_wait_s"], waited)
+            self._cond.notify()
+            return waited
+
+    def stats(self):
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["queue_depth"] = self._waiting
+            snapshot["avg_wait_s"] = snapshot["total_wait_s"] / snapshot["waited"] if snapshot["waited"] else 0.0
+            return snapshot
+
+
+# One bucket per provider, shared by every fetcher and thread
+_buckets = {
+    provider: TokenBucket(limits["rate_per_second"], limits["burst"])
+    for provider, limits in PROVIDER_RATE_LIMITS.items()
+}
+
+
+def provider_for_url(url):
+    """Maps a request URL to its provider budget ("openweathermap", "open-meteo"), or None."""
+    host = urlparse(url).netloc.lower()
+    for provider, limits in PROVIDER_RATE_LIMITS.items():
+        if any(host == domain or host.endswith("." + domain) for domain in limits["domains"]):
+            return provider
+    return None
+
+
+def acquire_for_url(url):
+    """Waits for the URL's provider budget. Returns the time waited in seconds (0 for unknown hosts)."""
+    provider = provider_for_url(url)
+    if provider is None:
+        return 0.0
+    return _buckets[provider].acquire()
+
+
+def get_rate_limit_stats():
+    """
+    Returns per-provider limiter statistics.
+
+    Returns:
+        dict: provider -> {acquired, waited, queue_depth, max_queue_depth, total_wait_s, avg_wait_s, max_wait_s}
+    """
+    return {provider: bucket.stats() for provider, bucket in _buckets.items()}
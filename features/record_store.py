@@ -0,0 +1,266 @@
+# features/record_store.py
+import csv
+import glob
+import json
+import os
+from datetime import date, datetime
+
+import numpy as np
+
+from features import file_lock, history_index
+from features.config import OM_WEATHER_CODES
+
+# Fixed-width binary copy of a history CSV (<file>.dat next to it). One 28-byte little-endian
+# record per day, with no header and no gaps: record i is day (first day + i), so a date
+# window is an index range and slicing the memory map copies nothing. Days missing from the
+# CSV are stored as empty records (NaN values, weather_code -1).
+# A small stamp file (<file>.dat.json) records the CSV checksum and size (from the sidecar index)
+# the records were written for; when they no longer match, the records are rebuilt from the CSV.
+STAMP_VERSION = 1
+RECORD_DTYPE = np.dtype([
+    ("day", "<i4"),            # Days since 1970-01-01
+    ("max_temp", "<f4"),
+    ("min_temp", "<f4"),
+    ("precip", "<f4"),
+    ("max_wind", "<f4"),
+    ("weather_code", "<i2"),   # Open-Meteo weather code, -1 if unknown
+    ("sunrise", "<i2"),        # Minutes after 00:00 UTC of the record's day
+    ("sunset", "<i2"),         # (may exceed 1440 when sunset is after midnight UTC)
+    ("reserved", "<i2"),
+])
+MISSING_MINUTES = -32768
+
+_EPOCH = date(1970, 1, 1)
+_DESCRIPTION_TO_CODE = {description: code for code, description in OM_WEATHER_CODES.items()}
+
+
+def record_path_for_csv(csv_filepath):
+    return os.path.splitext(csv_filepath)[0] + ".dat"
+
+
+def stamp_path_for_csv(csv_filepath):
+    return record_path_for_csv(csv_filepath) + ".json"
+
+
+def _load_stamp(csv_filepath):
+    try:
+        with open(stamp_path_for_csv(csv_filepath), 'r', encoding='utf-8') as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return stamp if stamp.get("version") == STAMP_VERSION else None
+
+
+def _save_stamp(csv_filepath, index):
+    tmp_path = stamp_path_for_csv(csv_filepath) + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": STAMP_VERSION, "crc32": index["crc32"], "size": index["size"]}, f)
+    os.replace(tmp_path, stamp_path_for_csv(csv_filepath))
+
+
+def _stamp_matches(stamp, index):
+    return stamp is not None and index is not None and stamp["crc32"] == index["crc32"] and stamp["size"] == index["size"]
+
+
+# Record files memory-mapped by open_records, per path, with the stamp they were opened under
+_mapped = {}
+
+
+def _release_map(csv_filepath):
+    """
+    Drops this module's memory map of a record file before the file is replaced or removed, so
+    the mapping is closed once no chart still holds a view of it (Windows cannot replace a
+    mapped file).
+    """
+    _mapped.pop(os.path.abspath(csv_filepath), None)
+
+
+def day_number(day):
+    """Converts a date (or ISO date string) to the day number stored in the records."""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    return (day - _EPOCH).days
+
+
+def _minutes_after(day, timestamp):
+    try:
+        moment = datetime.fromisoformat(str(timestamp))
+    except ValueError:
+        return MISSING_MINUTES
+    minutes = (moment.date() - day).days * 1440 + moment.hour * 60 + moment.minute
+    return minutes if abs(minutes) < 32768 else MISSING_MINUTES
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def rows_to_records(rows):
+    """
+    Converts CSV row dicts (dates ascending) into a dense record array from the first to
+    the last row's day, filling days without a row with empty records.
+    """
+    parsed = []
+    for row in rows:
+        try:
+            parsed.append((date.fromisoformat(row["Date"]), row))
+        except (KeyError, TypeError, ValueError):
+            continue
+    if not parsed:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    first = day_number(parsed[0][0])
+    records = _empty_records(first, day_number(parsed[-1][0]) - first + 1)
+    for day, row in parsed:
+        i = day_number(day) - first
+        if i < 0 or i >= len(records):
+            continue
+        records[i] = (
+            first + i,
+            _to_float(row["Max Temperature (°F)"]),
+            _to_float(row["Min Temperature (°F)"]),
+            _to_float(row["Precipitation (inch)"]),
+            _to_float(row["Max Wind Speed (mph)"]),
+            _DESCRIPTION_TO_CODE.get(row["Weather Description"], -1),
+            _minutes_after(day, row["Sunrise (UTC)"]),
+            _minutes_after(day, row["Sunset (UTC)"]),
+            0,
+        )
+    return records
+
+
+def _empty_records(first_day, count):
+    records = np.zeros(count, dtype=RECORD_DTYPE)
+    records["day"] = np.arange(first_day, first_day + count, dtype=np.int32)
+    for field in ("max_temp", "min_temp", "precip", "max_wind"):
+        records[field] = np.nan
+    records["weather_code"] = -1
+    records["sunrise"] = MISSING_MINUTES
+    records["sunset"] = MISSING_MINUTES
+    return records
+
+
+def _last_day(record_filepath):
+    """Reads the day of the last record (one seek, no scan). None for a missing or empty file."""
+    try:
+        with open(record_filepath, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size < RECORD_DTYPE.itemsize:
+                return None
+            f.seek(size - size % RECORD_DTYPE.itemsize - RECORD_DTYPE.itemsize)
+            return int(np.frombuffer(f.read(RECORD_DTYPE.itemsize), dtype=RECORD_DTYPE)["day"][0])
+    except OSError:
+        return None
+
+
+def append_rows(csv_filepath, rows, checksum_before):
+    """
+    Appends the days in rows that are after the last stored record, filling any gap in between.
+    Rows at or before the last stored day are ignored, like the CSV append. When the record file
+    did not match the CSV as it was before the append (checksum_before), it is rebuilt instead.
+
+    Returns:
+        int: Number of records written (including gap fillers).
+    """
+    with file_lock.locked(csv_filepath):
+        record_filepath = record_path_for_csv(csv_filepath)
+        stamp = _load_stamp(csv_filepath)
+        if checksum_before is None or stamp is None or stamp["crc32"] != checksum_before or not os.path.exists(record_filepath):
+            return build_from_csv(csv_filepath)
+        records = rows_to_records(rows)
+        last_day = _last_day(record_filepath)
+        if len(records) and last_day is not None:
+            records = records[records["day"] > last_day]
+            gap = int(records["day"][0]) - last_day - 1 if len(records) else 0
+            if gap > 0:
+                records = np.concatenate([_empty_records(last_day + 1, gap), records])
+        if len(records):
+            with open(record_filepath, 'ab') as f:
+                size = f.seek(0, os.SEEK_END)
+                f.truncate(size - size % RECORD_DTYPE.itemsize)  # Drop a torn record from an interrupted write
+                f.write(records.tobytes())
+        _save_stamp(csv_filepath, history_index.get_index(csv_filepath))
+        return len(records)
+
+
+def build_from_csv(csv_filepath):
+    """Writes the record file for a CSV from scratch (temp file + rename). Returns the record count."""
+    with file_lock.locked(csv_filepath):
+        index = history_index.get_index(csv_filepath)
+        with open(csv_filepath, 'r', newline='', encoding='utf-8') as f:
+            records = rows_to_records(csv.DictReader(f))
+        record_filepath = record_path_for_csv(csv_filepath)
+        tmp_filepath = record_filepath + ".tmp"
+        with open(tmp_filepath, 'wb') as f:
+            f.write(records.tobytes())
+        _release_map(csv_filepath)
+        os.replace(tmp_filepath, record_filepath)
+        _save_stamp(csv_filepath, index)
+    return len(records)
+
+
+def remove_records(csv_filepath):
+    """Deletes the record file, e.g. after the CSV was truncated; it is rebuilt on next use."""
+    _release_map(csv_filepath)
+    for path in (record_path_for_csv(csv_filepath), stamp_path_for_csv(csv_filepath)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def open_records(csv_filepath):
+    """
+    Memory-maps a CSV's record file read-only. The file is rebuilt first when it is missing or
+    its stamp does not match the CSV's current checksum and size (e.g. the CSV was edited
+    outside the app). Returns None when the CSV does not exist.
+    """
+    index = history_index.get_index(csv_filepath)
+    if index is None:
+        return None
+    key = os.path.abspath(csv_filepath)
+    entry = _mapped.get(key)
+    if entry is not None and _stamp_matches(entry[0], index):
+        return entry[1]
+    stamp = _load_stamp(csv_filepath)
+    record_filepath = record_path_for_csv(csv_filepath)
+    if not _stamp_matches(stamp, index) or not os.path.exists(record_filepath):
+        build_from_csv(csv_filepath)
+        stamp = _load_stamp(csv_filepath)
+    _release_map(csv_filepath)
+    count = os.path.getsize(record_filepath) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    records = np.memmap(record_filepath, dtype=RECORD_DTYPE, mode='r', shape=(count,))
+    _mapped[key] = (stamp, records)
+    return records
+
+
+def window(records, start_date=None, end_date=None):
+    """Returns the records from start_date to end_date inclusive as a view (no copy, no scan)."""
+    if records is None or not len(records):
+        return records
+    first = int(records["day"][0])
+    start = 0 if start_date is None else max(0, day_number(start_date) - first)
+    stop = len(records) if end_date is None else max(0, day_number(end_date) - first + 1)
+    return records[start:stop]
+
+
+def migrate_csv_histories(history_dir="historical_data"):
+    """One-shot: writes the record file for every *_daily_weather_history.csv. Returns the file count."""
+    migrated = 0
+    for csv_filepath in sorted(glob.glob(os.path.join(history_dir, "*_daily_weather_history.csv"))):
+        try:
+            build_from_csv(csv_filepath)
+            migrated += 1
+        except (OSError, ValueError) as e:
+            print(f"Skipping {csv_filepath}: {e}")
+    print(f"Wrote {migrated} record files in {history_dir}")
+    return migrated
+
+
+if __name__ == "__main__":
+    # python -m features.record_store
+    migrate_csv_histories()
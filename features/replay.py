@@ -0,0 +1,221 @@
+# features/replay.py
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import requests
+
+from features.http_client import get_session, set_transport, get_latency_stats, reset_latency_stats
+from features.rate_limit import get_rate_limit_stats
+
+FIXTURES_DIR = os.getenv("WEATHER_FIXTURES_DIR", os.path.join("fixtures", "api"))
+
+# Query parameters that must never end up in a fixture file or its key
+_SECRET_PARAMS = {"appid"}
+
+
+def _public_params(params):
+    public = {}
+    for name, value in sorted((params or {}).items()):
+        if name in _SECRET_PARAMS:
+            continue
+        public[name] = list(value) if isinstance(value, (list, tuple)) else value
+    return public
+
+
+def fixture_key(url, params):
+    """Stable fixture name for a request: a hash of the URL and its non-secret parameters."""
+    raw = json.dumps({"url": url, "params": _public_params(params)}, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ReplayResponse:
+    """Minimal stand-in for requests.Response, enough for http_client.get_json."""
+
+    def __init__(self, url, status_code, body, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+
+    def json(self):
+        return json.loads(self._body)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def close(self):
+        pass
+
+
+class RecordingTransport:
+    """Forwards requests to a real transport and saves every response as a JSON fixture."""
+
+    def __init__(self, inner=None, fixtures_dir=FIXTURES_DIR):
+        self.inner = inner if inner is not None else get_session()
+        self.fixtures_dir = fixtures_dir
+        os.makedirs(fixtures_dir, exist_ok=True)
+
+    def get(self, url, params=None, timeout=None):
+        response = self.inner.get(url, params=params, timeout=timeout)
+        if response.status_code == 200:
+            fixture = {"url": url, "params": _public_params(params),
+                       "status_code": response.status_code, "body": response.text}
+            path = os.path.join(self.fixtures_dir, f"{fixture_key(url, params)}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(fixture, f)
+        return response
+
+
+class ReplayTransport:
+    """
+    Serves recorded fixtures instead of calling the live APIs.
+
+    Args:
+        fixtures_dir (str): Directory written by RecordingTransport.
+        latency_ms (float): Artificial latency added to every response.
+        jitter_ms (float): Random extra latency in [0, jitter_ms].
+        error_rate (float): Fraction of requests answered with a 503 (exercises retries).
+        seed (int): Seed for the latency/error random generator, for reproducible runs.
+    """
+
+    # No provider quota is spent, so http_client does not queue these requests on the rate limiter
+    rate_limited = False
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=None):
+        self.fixtures_dir = fixtures_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.served = 0
+        self.missing = 0
+        self.injected_errors = 0
+
+    def get(self, url, params=None, timeout=None):
+        with self._random_lock:
+            delay_ms = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+            fail = self._random.random() < self.error_rate
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+        if fail:
+            self.injected_errors += 1
+            return ReplayResponse(url, 503, "{}")
+
+        path = os.path.join(self.fixtures_dir, f"{fixture_key(url, params)}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                fixture = json.load(f)
+        except FileNotFoundError:
+            self.missing += 1
+            return ReplayResponse(url, 404, json.dumps({"error": True, "reason": "No fixture recorded"}))
+        self.served += 1
+        return ReplayResponse(url, fixture["status_code"], fixture["body"])
+
+
+def install_from_env():
+    """
+    Installs a stand-in transport according to WEATHER_API_MODE:
+        record  - call the live APIs and save responses to WEATHER_FIXTURES_DIR
+        replay  - serve WEATHER_FIXTURES_DIR, with optional WEATHER_REPLAY_LATENCY_MS,
+                  WEATHER_REPLAY_JITTER_MS and WEATHER_REPLAY_ERROR_RATE
+    Any other value (the default) leaves the live session in place.
+    """
+    mode = os.getenv("WEATHER_API_MODE", "live").lower()
+    if mode == "record":
+        set_transport(RecordingTransport())
+    elif mode == "replay":
+        set_transport(ReplayTransport(
+            latency_ms=float(os.getenv("WEATHER_REPLAY_LATENCY_MS", 0)),
+            jitter_ms=float(os.getenv("WEATHER_REPLAY_JITTER_MS", 0)),
+            error_rate=float(os.getenv("WEATHER_REPLAY_ERROR_RATE", 0))
+        ))
+    return mode
+
+
+def benchmark_pipeline(city_entries, start_date_str, end_date_str, iterations=3):
+    """
+    Runs fetch -> create_historical_data_csv -> CSV load for each city against whatever
+    transport is installed and reports timings. Every iteration writes into a fresh, empty
+    history directory, so each pass creates the CSVs instead of finding the rows already stored.
+    Time spent waiting for the rate limiter (live or recording transports only) is reported
+    separately under "rate_limit_wait_s".
+
+    Returns:
+        dict: {"runs", "total_s", "cities_per_s", "per_city_ms": {min, avg, max},
+               "rate_limit_wait_s": {provider: seconds}, "http": latency stats}
+    """
+    import csv
+    import features.csv_files as csv_files
+    from features.api import fetch_historical_daily_data
+    from features.config import STATE_CITY_DATA
+
+    original_dir = csv_files.HISTORY_DIR
+    work_dir = tempfile.mkdtemp(prefix="weather_bench_")
+    csv_files.HISTORY_DIR = work_dir
+    reset_latency_stats()
+    wait_before = {provider: stats["total_wait_s"] for provider, stats in get_rate_limit_stats().items()}
+    timings = []
+    try:
+        start = time.perf_counter()
+        for iteration in range(iterations):
+            csv_files.HISTORY_DIR = os.path.join(work_dir, f"run{iteration}")
+            os.makedirs(csv_files.HISTORY_DIR)
+            for state_name, city_info in city_entries:
+                city_start = time.perf_counter()
+                data = fetch_historical_daily_data(city_info["lat"], city_info["lon"], city_info["timezone"],
+                                                   start_date_str, end_date_str, show_errors=False)
+                if data:
+                    csv_files.create_historical_data_csv(state_name, city_info["name"], data,
+                                                         start_date_str, end_date_str, STATE_CITY_DATA)
+                    with open(csv_files.history_csv_path(state_name, city_info["name"]), newline="", encoding="utf-8") as f:
+                        sum(1 for _ in csv.DictReader(f))
+                timings.append((time.perf_counter() - city_start) * 1000)
+        total = time.perf_counter() - start
+    finally:
+        csv_files.HISTORY_DIR = original_dir
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "runs": len(timings),
+        "total_s": total,
+        "cities_per_s": len(timings) / total if total else 0.0,
+        "per_city_ms": {"min": min(timings), "avg": sum(timings) / len(timings), "max": max(timings)} if timings else {},
+        "rate_limit_wait_s": {provider: stats["total_wait_s"] - wait_before.get(provider, 0.0)
+                              for provider, stats in get_rate_limit_stats().items()},
+        "http": get_latency_stats(),
+    }
+
+
+if __name__ == "__main__":
+    # Example:
+    #   WEATHER_API_MODE=record python -m features.replay --iterations 1      (capture fixtures)
+    #   python -m features.replay --latency-ms 80 --error-rate 0.05           (replay benchmark)
+    from features.config import iter_city_entries
+
+    parser = argparse.ArgumentParser(description="Benchmark the fetch -> CSV -> load pipeline against recorded fixtures.")
+    parser.add_argument("--start", default="2024-07-01")
+    parser.add_argument("--end", default="2025-06-30")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if os.getenv("WEATHER_API_MODE", "replay").lower() == "record":
+        set_transport(RecordingTransport())
+    else:
+        set_transport(ReplayTransport(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                      error_rate=args.error_rate, seed=args.seed))
+
+    results = benchmark_pipeline(list(iter_city_entries()), args.start, args.end, args.iterations)
+    print(json.dumps(results, indent=2))
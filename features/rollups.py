@@ -0,0 +1,135 @@
+# features/rollups.py
+import csv
+import json
+import math
+import os
+
+from features import file_lock, history_index
+from features.aggregation import monthly_aggregates, format_dates
+from features.daily_series import DailySeries
+
+# Precomputed monthly aggregates per city, kept next to the history CSV (<file>.rollup.json).
+# Sums are stored rather than means so appended days can be merged in without re-reading the
+# month; the rollup records the CSV checksum it covers and is rebuilt when that no longer matches.
+ROLLUP_VERSION = 1
+TEMPERATURE_FIELDS = ("avg_temp", "min_temp", "max_temp")
+
+
+def rollup_path_for_csv(csv_filepath):
+    return os.path.splitext(csv_filepath)[0] + ".rollup.json"
+
+
+def compute_rollup(series):
+    """
+    Aggregates a DailySeries by calendar month.
+
+    Returns:
+        dict: "YYYY-MM" -> {"count", "<field>_sum", "<field>_min", "<field>_max" for avg/min/max
+              temperature, "precip_total", "wind_max"}
+    """
+    if not len(series):
+        return {}
+    months, aggregates = monthly_aggregates(series.dates, {
+        "avg_temp": series.avg_temp, "min_temp": series.min_temp, "max_temp": series.max_temp,
+        "precip": series.precip, "max_wind": series.max_wind,
+    })
+    columns = {"count": aggregates["avg_temp"]["count"]}
+    for field in TEMPERATURE_FIELDS:
+        for stat in ("sum", "min", "max"):
+            columns[f"{field}_{stat}"] = aggregates[field][stat]
+    columns["precip_total"] = aggregates["precip"]["sum"]
+    columns["wind_max"] = aggregates["max_wind"]["max"]
+
+    rollup = {}
+    for i, month in enumerate(format_dates(months, "M").tolist()):
+        rollup[month] = {name: _json_number(values[i]) for name, values in columns.items()}
+    return rollup
+
+
+def _json_number(value):
+    value = value.item()
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def merge_rollups(rollup, update):
+    """Merges the aggregates of newly appended days (update) into rollup, in place."""
+    for month, new in update.items():
+        old = rollup.get(month)
+        if old is None:
+            rollup[month] = new
+            continue
+        old["count"] += new["count"]
+        for field in TEMPERATURE_FIELDS:
+            old[f"{field}_sum"] += new[f"{field}_sum"]
+            old[f"{field}_min"] = min(old[f"{field}_min"], new[f"{field}_min"])
+            old[f"{field}_max"] = max(old[f"{field}_max"], new[f"{field}_max"])
+        old["precip_total"] += new["precip_total"]
+        winds = [wind for wind in (old["wind_max"], new["wind_max"]) if wind is not None]
+        old["wind_max"] = max(winds) if winds else None
+    return rollup
+
+
+def _load(csv_filepath):
+    try:
+        with open(rollup_path_for_csv(csv_filepath), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get("version") == ROLLUP_VERSION else None
+
+
+def _save(csv_filepath, months, checksum):
+    tmp_path = rollup_path_for_csv(csv_filepath) + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": ROLLUP_VERSION, "crc32": checksum, "months": months}, f)
+        os.replace(tmp_path, rollup_path_for_csv(csv_filepath))
+    except OSError as e:
+        print(f"Warning: Could not write monthly rollup for {csv_filepath}: {e}")
+
+
+def rebuild_rollup(csv_filepath):
+    """
+    Recomputes a CSV's rollup from the whole file and saves it. The file's lock is held so the
+    checksum and the rows read always describe the same file.
+    """
+    with file_lock.locked(csv_filepath):
+        index = history_index.get_index(csv_filepath)
+        with open(csv_filepath, 'r', newline='', encoding='utf-8') as f:
+            months = compute_rollup(DailySeries.from_rows(csv.DictReader(f)))
+        _save(csv_filepath, months, index["crc32"] if index else None)
+    return months
+
+
+def note_append(csv_filepath, rows, checksum_before):
+    """
+    Merges appended rows into the rollup when it covered the file as it was before the append
+    (checksum_before); otherwise the rollup is rebuilt from the file.
+    """
+    data = _load(csv_filepath)
+    index = history_index.get_index(csv_filepath)
+    if data is None or checksum_before is None or data["crc32"] != checksum_before or index is None:
+        return rebuild_rollup(csv_filepath)
+    months = merge_rollups(data["months"], compute_rollup(DailySeries.from_rows(rows)))
+    _save(csv_filepath, months, index["crc32"])
+    return months
+
+
+def get_monthly_rollup(csv_filepath):
+    """
+    Returns a CSV's monthly aggregates (see compute_rollup), rebuilding them when the CSV's
+    checksum no longer matches. Returns None when the CSV does not exist.
+    """
+    index = history_index.get_index(csv_filepath)
+    if index is None:
+        return None
+    data = _load(csv_filepath)
+    if data is not None and data["crc32"] == index["crc32"]:
+        return data["months"]
+    return rebuild_rollup(csv_filepath)
+
+
+def monthly_means(rollup, field="avg_temp"):
+    """Returns (months, means) in month order for one temperature field of a rollup."""
+    months = sorted(month for month, stats in rollup.items() if stats["count"])
+    return months, [rollup[month][f"{field}_sum"] / rollup[month]["count"] for month in months]
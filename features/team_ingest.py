@@ -0,0 +1,289 @@
+# features/team_ingest.py
+import glob
+import hashlib
+import json
+import os
+import re
+
+import pandas as pd
+
+from features.config import TEAM_DATA_DIR, TEAM_MERGED_CSV, TEAM_CACHE_DIR
+
+# Canonical team schema (the one team_weather_data.csv uses): temperatures in °C,
+# wind in mph and precipitation in inches.
+TEAM_COLUMNS = ["date", "city", "max_wind_spd", "precip", "max_temp", "min_temp"]
+VALUE_COLUMNS = ["max_wind_spd", "precip", "max_temp", "min_temp"]
+TEAM_DTYPES = {"city": "category", "max_wind_spd": "float32", "precip": "float32",
+               "max_temp": "float32", "min_temp": "float32"}
+
+# Header (lower-cased, only letters/digits/°) -> (canonical column, unit named in the header or None)
+HEADER_ALIASES = {
+    "date": ("date", None),
+    "city": ("city", None),
+    "maxwindspd": ("max_wind_spd", None),
+    "maxwindspeed": ("max_wind_spd", None),
+    "maxwindspeedmph": ("max_wind_spd", "mph"),
+    "maxwindspeedkmh": ("max_wind_spd", "km/h"),
+    "precip": ("precip", None),
+    "precipitation": ("precip", None),
+    "precipitationinch": ("precip", "inch"),
+    "precipitationmm": ("precip", "mm"),
+    "maxtemp": ("max_temp", None),
+    "maxtemp°c": ("max_temp", "°C"),
+    "maxtemp°f": ("max_temp", "°F"),
+    "mintemp": ("min_temp", None),
+    "mintemp°c": ("min_temp", "°C"),
+    "mintemp°f": ("min_temp", "°F"),
+}
+
+# Plausible range for a daily temperature in °C, after conversion
+TEMPERATURE_RANGE_C = (-60.0, 60.0)
+
+MANIFEST_FILENAME = "manifest.json"
+MERGED_CACHE_FILENAME = "team_weather_data.pkl"
+CACHE_VERSION = 1
+
+
+def _header_key(name):
+    return re.sub(r"[^a-z0-9°]", "", name.lower())
+
+
+def detect_schema(header, frame):
+    """
+    Works out how a member file maps onto the team schema.
+
+    Units come from the header when it names them (e.g. "Max Temp (°C)"). Unitless temperature
+    columns are taken as °F when the median daily maximum is above 50 (no US city has a median
+    daily maximum of 50 °C), otherwise °C. The date format is ISO or M/D/YYYY.
+
+    Returns:
+        dict: {"columns": {source name: canonical name}, "temp_unit", "wind_unit", "precip_unit", "date_format"}
+    """
+    columns, units = {}, {}
+    for name in header:
+        alias = HEADER_ALIASES.get(_header_key(name))
+        if alias is None:
+            continue
+        canonical, unit = alias
+        columns[name] = canonical
+        if unit:
+            units[canonical] = unit
+    missing = [column for column in TEAM_COLUMNS if column not in columns.values()]
+    if missing:
+        raise ValueError(f"missing columns {missing} (header: {header})")
+
+    source = {canonical: name for name, canonical in columns.items()}
+    temp_unit = units.get("max_temp") or units.get("min_temp")
+    if temp_unit is None:
+        median_max = pd.to_numeric(frame[source["max_temp"]], errors="coerce").median()
+        temp_unit = "°F" if median_max > 50 else "°C"
+
+    first_date = str(frame[source["date"]].dropna().iloc[0]).strip() if len(frame) else ""
+    date_format = "%Y-%m-%d" if re.match(r"^\d{4}-\d{1,2}-\d{1,2}$", first_date) else "%m/%d/%Y"
+
+    return {
+        "columns": columns,
+        "temp_unit": temp_unit,
+        "wind_unit": units.get("max_wind_spd", "mph"),
+        "precip_unit": units.get("precip", "inch"),
+        "date_format": date_format,
+    }
+
+
+def _read_member_csv(csv_filepath):
+    """
+    Reads a member CSV with the C parser and explicit dtypes: the header is read first, value
+    columns are parsed straight to float64 and the city as a categorical (no type inference).
+    Files with non-numeric values fall back to strings, which are coerced during validation.
+    """
+    # utf-8-sig strips the byte-order mark some exports start with
+    options = {"encoding": "utf-8-sig", "skipinitialspace": True, "engine": "c"}
+    header = [name.strip() for name in pd.read_csv(csv_filepath, nrows=0, **options).columns]
+    dtypes = {}
+    for position, name in enumerate(header):
+        alias = HEADER_ALIASES.get(_header_key(name))
+        canonical = alias[0] if alias else None
+        dtypes[position] = "float64" if canonical in VALUE_COLUMNS else ("category" if canonical == "city" else str)
+    try:
+        raw = pd.read_csv(csv_filepath, header=0, names=header, dtype=dtypes, **options)
+    except ValueError:
+        raw = pd.read_csv(csv_filepath, header=0, names=header, dtype=str, **options)
+    return raw
+
+
+def normalise_member_file(csv_filepath):
+    """
+    Reads one member CSV in any of the known layouts and returns it in the team schema,
+    with validated rows only.
+
+    Returns:
+        tuple: (DataFrame, schema dict, number of rows dropped by validation)
+    """
+    raw = _read_member_csv(csv_filepath)
+    schema = detect_schema(list(raw.columns), raw)
+    frame = raw[list(schema["columns"])].rename(columns=schema["columns"])
+
+    frame["date"] = pd.to_datetime(frame["date"].str.strip(), format=schema["date_format"], errors="coerce")
+    # "Clearwater, FL" -> "Clearwater" (applied once per category, not per row)
+    frame["city"] = frame["city"].astype("category").map(lambda city: str(city).split(",")[0].strip())
+    for column in VALUE_COLUMNS:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").astype("float64")
+
+    # Unit conversion, one vectorised operation per column
+    if schema["temp_unit"] == "°F":
+        frame[["max_temp", "min_temp"]] = ((frame[["max_temp", "min_temp"]] - 32) * 5 / 9).round(1)
+    if schema["wind_unit"] == "km/h":
+        frame["max_wind_spd"] = (frame["max_wind_spd"] / 1.609344).round(1)
+    if schema["precip_unit"] == "mm":
+        frame["precip"] = (frame["precip"] / 25.4).round(3)
+
+    low, high = TEMPERATURE_RANGE_C
+    valid = (
+        frame["date"].notna()
+        & frame["city"].notna()
+        & frame["max_temp"].between(low, high)
+        & frame["min_temp"].between(low, high)
+        & (frame["max_temp"] >= frame["min_temp"])
+        & (frame["precip"].isna() | (frame["precip"] >= 0))
+        & (frame["max_wind_spd"].isna() | (frame["max_wind_spd"] >= 0))
+    )
+    dropped = int((~valid).sum())
+    frame = frame[valid].drop_duplicates(subset=["city", "date"], keep="last")
+    return frame[TEAM_COLUMNS].reset_index(drop=True), schema, dropped
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def _file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_FILENAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": CACHE_VERSION, "files": {}}
+    return manifest if manifest.get("version") == CACHE_VERSION else {"version": CACHE_VERSION, "files": {}}
+
+
+def _save_manifest(cache_dir, manifest):
+    tmp_path = os.path.join(cache_dir, MANIFEST_FILENAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, os.path.join(cache_dir, MANIFEST_FILENAME))
+
+
+def _member_cache_path(cache_dir, filename):
+    return os.path.join(cache_dir, "members", os.path.splitext(filename)[0] + ".pkl")
+
+
+def _to_team_dtypes(frame):
+    frame = frame.astype({column: dtype for column, dtype in TEAM_DTYPES.items() if column != "city"})
+    frame["city"] = frame["city"].astype("category")
+    return frame
+
+
+def ingest_team_data(data_dir=TEAM_DATA_DIR, cache_dir=TEAM_CACHE_DIR, force=False):
+    """
+    Rebuilds the merged team dataset from the member CSVs in data_dir, re-processing only files
+    whose mtime/size changed and whose content hash differs from the last run.
+
+    The hand-merged team_weather_data.csv is read as one more source, but only for cities that
+    have no member file of their own (e.g. Queens). The result is written to a typed pickle
+    cache that load_team_frame reads without any CSV parsing.
+
+    Returns:
+        DataFrame: The merged dataset (date, city as categorical, float32 values), sorted by city and date.
+    """
+    os.makedirs(os.path.join(cache_dir, "members"), exist_ok=True)
+    manifest = _load_manifest(cache_dir)
+    merged_cache = os.path.join(cache_dir, MERGED_CACHE_FILENAME)
+
+    paths = sorted(glob.glob(os.path.join(data_dir, "*.csv")))
+    filenames = [os.path.basename(path) for path in paths]
+    changed = force or set(filenames) != set(manifest["files"]) or not os.path.exists(merged_cache)
+
+    members = {}
+    for path, filename in zip(paths, filenames):
+        entry = manifest["files"].get(filename)
+        signature = _file_signature(path)
+        member_cache = _member_cache_path(cache_dir, filename)
+        if not force and entry and os.path.exists(member_cache):
+            if {"mtime_ns": entry["mtime_ns"], "size": entry["size"]} == signature:
+                members[filename] = member_cache
+                continue
+            content_hash = _file_hash(path)
+            if content_hash == entry["sha1"]:
+                entry.update(signature)  # Touched but not changed
+                members[filename] = member_cache
+                continue
+        else:
+            content_hash = _file_hash(path)
+
+        try:
+            frame, schema, dropped = normalise_member_file(path)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path}: {e}")
+            manifest["files"].pop(filename, None)
+            continue
+        if dropped:
+            print(f"{filename}: dropped {dropped} rows that failed validation")
+        frame.to_pickle(member_cache)
+        manifest["files"][filename] = dict(signature, sha1=content_hash, rows=len(frame),
+                                           cities=sorted(frame["city"].unique().tolist()),
+                                           temp_unit=schema["temp_unit"], date_format=schema["date_format"])
+        members[filename] = member_cache
+        changed = True
+        print(f"Ingested {filename} ({len(frame)} rows, {schema['temp_unit']})")
+
+    for filename in set(manifest["files"]) - set(members):
+        manifest["files"].pop(filename)
+
+    if not changed:
+        _save_manifest(cache_dir, manifest)
+        return pd.read_pickle(merged_cache)
+
+    frames = []
+    member_cities = set()
+    for filename, member_cache in members.items():
+        if filename != TEAM_MERGED_CSV:
+            frame = pd.read_pickle(member_cache)
+            member_cities.update(frame["city"].unique().tolist())
+            frames.append(frame)
+    if TEAM_MERGED_CSV in members:
+        legacy = pd.read_pickle(members[TEAM_MERGED_CSV])
+        frames.append(legacy[~legacy["city"].isin(member_cities)])
+
+    merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=TEAM_COLUMNS)
+    merged = _to_team_dtypes(merged.sort_values(["city", "date"], kind="stable").reset_index(drop=True))
+
+    tmp_path = merged_cache + ".tmp"
+    merged.to_pickle(tmp_path)
+    os.replace(tmp_path, merged_cache)
+    _save_manifest(cache_dir, manifest)
+    print(f"Team dataset rebuilt: {len(merged)} rows, {merged['city'].nunique()} cities")
+    return merged
+
+
+def load_team_frame(data_dir=TEAM_DATA_DIR, cache_dir=TEAM_CACHE_DIR):
+    """
+    Returns the merged team dataset, or None when there is no team data. When no member file
+    changed this only stats the files and unpickles the cache.
+    """
+    if not os.path.isdir(data_dir):
+        return None
+    merged = ingest_team_data(data_dir, cache_dir)
+    return merged if len(merged) else None
+
+
+if __name__ == "__main__":
+    # python -m features.team_ingest   (rebuilds the cache from scratch)
+    ingest_team_data(force=True)
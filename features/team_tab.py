@@ -2,11 +2,13 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import pandas as pd
-import os
+import numpy as np
 from datetime import datetime
 from collections import defaultdict
 
+from features.aggregation import format_dates
+from features.team_ingest import load_team_frame, VALUE_COLUMNS
+
 class TeamTab(ttk.Frame):
     def __init__(self, parent_notebook):
         super().__init__(parent_notebook)
@@ -18,18 +20,34 @@ class TeamTab(ttk.Frame):
         self.city_vars = {}  # Dict of city:tk.BooleanVar
         self.selected_variable = tk.StringVar(value="max_temp")
         self.chart_type = tk.StringVar(value="monthly")
-
+        self.loaded = False
+        # Month x city means of every variable, computed once per loaded dataset
+        self.data_version = 0
+        self.monthly_pivot = None
+        self.monthly_pivot_version = None
+
+        # Team data is loaded and the controls built the first time the tab is shown,
+        # not at app startup
+        self.bind("<Map>", self._on_first_show)
+
+    def _on_first_show(self, event=None):
+        if self.loaded:
+            return
+        self.loaded = True
+        self.unbind("<Map>")
         self.load_team_data()
         self.create_widgets()
 
     def load_team_data(self):
-        csv_filepath = os.path.join("GroupData", "team_weather_data.csv")
+        # Member CSVs are normalised into a typed cache; unchanged files are not parsed again
         try:
-            self.team_data = pd.read_csv(csv_filepath)
-            self.team_data['date'] = pd.to_datetime(self.team_data['date'])
-        except FileNotFoundError:
-            messagebox.showerror("Error", "team_weather_data.csv not found!")
+            self.team_data = load_team_frame()
+        except (OSError, ValueError) as e:
+            print(f"Error loading team data: {e}")
             self.team_data = None
+        self.data_version += 1
+        if self.team_data is None:
+            messagebox.showerror("Error", "No team data found in GroupData!")
 
     def create_widgets(self):
         header_label = tk.Label(self, text="Team Weather Data", font=("Arial", 20, "bold"), bg="#8baaed")
@@ -121,27 +139,43 @@ class TeamTab(ttk.Frame):
             tk.Label(self.graph_frame, text="No cities selected!", fg="red").pack()
             return
 
+        if chart_type == "monthly":
+            pivot = self._select_monthly_pivot(selected_cities, variable)
+            if pivot.empty:
+                tk.Label(self.graph_frame, text="No data for selected cities!", fg="red").pack()
+                return
+            self.plot_monthly_average_chart(pivot, variable)
+            return
+
         filtered_data = self.team_data[self.team_data['city'].isin(selected_cities)]
 
         if filtered_data.empty:
             tk.Label(self.graph_frame, text="No data for selected cities!", fg="red").pack()
             return
 
-        if chart_type == "monthly":
-            self.plot_monthly_average_chart(filtered_data, variable)
-        else:
-            self.plot_daily_chart(filtered_data, variable)
-
-    def plot_monthly_average_chart(self, data, variable):
-        # Plot a grouped bar chart (one bar per city per month for selected cities)
+        self.plot_daily_chart(filtered_data, variable)
+
+    def _get_monthly_pivot(self):
+        # One groupby over all cities and variables per dataset version; columns are (variable, city)
+        if self.monthly_pivot is None or self.monthly_pivot_version != self.data_version:
+            data = self.team_data
+            plot_date = data['date'].dt.to_period('M').dt.to_timestamp().rename('plot_date')
+            grouped = data.groupby([plot_date, 'city'], observed=True)[VALUE_COLUMNS].mean()
+            self.monthly_pivot = grouped.unstack('city').sort_index()
+            self.monthly_pivot_version = self.data_version
+        return self.monthly_pivot
+
+    def _select_monthly_pivot(self, cities, variable):
+        # Selection changes only pick columns; months where no selected city has data are dropped
+        pivot = self._get_monthly_pivot()[variable]
+        selected = set(cities)
+        columns = [city for city in pivot.columns if city in selected]
+        return pivot[columns].dropna(how='all')
+
+    def plot_monthly_average_chart(self, pivot, variable):
+        # Plot a grouped bar chart (one bar per city per month for selected cities);
+        # pivot has one row per month and one column per city
         fig, ax = plt.subplots(figsize=(12, 6))
-        data = data.copy()
-        data['year'] = data['date'].dt.year
-        data['month'] = data['date'].dt.month
-        grouped = data.groupby(['year', 'month', 'city'])[variable].mean().reset_index()
-        grouped['plot_date'] = pd.to_datetime(grouped['year'].astype(str) + '-' + grouped['month'].astype(str).str.zfill(2) + '-01')
-        # Pivot so each city is a column
-        pivot = grouped.pivot(index='plot_date', columns='city', values=variable)
         cities = pivot.columns.tolist()
         x = range(len(pivot.index))
         total_width = 0.8
@@ -180,11 +214,27 @@ class TeamTab(ttk.Frame):
 
         selected_cities = self.selected_cities
         if len(selected_cities) > 1:
-            # Prepare data for selected cities, sorted by date
-            all_dates = sorted(data['date'].unique())
+            # Per-city date-sorted arrays, built once per selection; slider ticks only
+            # slice them (see _update_all_cities_daily_chart_view)
+            city_series = {}
+            for city, city_data in data.groupby('city', observed=True, sort=False):
+                dates = city_data['date'].to_numpy(dtype='datetime64[D]')
+                order = np.argsort(dates, kind='stable')
+                city_series[city] = (dates[order], city_data[variable].to_numpy(dtype=float)[order])
+            all_dates = np.unique(np.concatenate([dates for dates, _ in city_series.values()]))
             self.chart_data['all_dates'] = all_dates
-            self.chart_data['all_cities'] = selected_cities
-            self.chart_data['data'] = data
+            self.chart_data['all_cities'] = [city for city in selected_cities if city in city_series]
+            self.chart_data['city_series'] = city_series
+            self.chart_data['variable'] = variable
+
+            # One line per city, created once and updated in place while scrolling
+            self.chart_data['lines'] = {
+                city: ax.plot(all_dates[:0], [], marker='o', label=city)[0]
+                for city in self.chart_data['all_cities']
+            }
+            ax.set_ylabel(variable)
+            ax.tick_params(axis='x', rotation=45)
+            ax.legend(title="City")
 
             num_dates = len(all_dates)
             slider = ttk.Scale(
@@ -216,30 +266,31 @@ class TeamTab(ttk.Frame):
     def _update_all_cities_daily_chart_view(self, scroll_value):
         start_index = int(float(scroll_value))
         all_dates = self.chart_data['all_dates']
-        cities = self.chart_data['all_cities']
-        data = self.chart_data['data']
+        city_series = self.chart_data['city_series']
+        variable = self.chart_data['variable']
         ax = self.chart_widgets['ax']
         canvas = self.chart_widgets['canvas']
         visible_points = 14
         end_index = start_index + visible_points
         visible_dates = all_dates[start_index:end_index]
-        ax.cla()
-        for city in cities:
-            city_data = data[(data['city'] == city) & (data['date'].isin(visible_dates))]
-            ax.plot(city_data['date'], city_data[self.selected_variable.get()], marker='o', label=city)
+        for city, line in self.chart_data['lines'].items():
+            dates, values = city_series[city]
+            if len(visible_dates):
+                lo = np.searchsorted(dates, visible_dates[0], side='left')
+                hi = np.searchsorted(dates, visible_dates[-1], side='right')
+            else:
+                lo = hi = 0
+            line.set_data(dates[lo:hi], values[lo:hi])
+        ax.relim()
+        ax.autoscale_view()
         # Dynamic title with date range
-        if visible_dates:
-            date_fmt = "%Y-%m-%d"
-            start_str = visible_dates[0].strftime(date_fmt)
-            end_str = visible_dates[-1].strftime(date_fmt)
-            title = f"Daily {self.selected_variable.get()} for Selected Cities\n{start_str} to {end_str}"
+        if len(visible_dates):
+            labels = format_dates(visible_dates[[0, -1]])
+            title = f"Daily {variable} for Selected Cities\n{labels[0]} to {labels[1]}"
         else:
-            title = f"Daily {self.selected_variable.get()} for Selected Cities"
+            title = f"Daily {variable} for Selected Cities"
         ax.set_title(title, pad=20)
-        ax.set_ylabel(self.selected_variable.get())
-        ax.tick_params(axis='x', rotation=45)
-        ax.legend(title="City")
-        canvas.draw()
+        canvas.draw_idle()
 
     def _update_daily_chart_view(self, scroll_value):
         start_index = int(float(scroll_value))
@@ -16,6 +16,10 @@ load_dotenv(os.path.join(project_root, ".env")) # Specify path to .env file
 
 # Import the main application class
 from features.main_app import WeatherDashboardApp
+from features.replay import install_from_env
+
+# Optional record/replay stand-in for the weather APIs (WEATHER_API_MODE=record|replay)
+install_from_env()
 
 
 if __name__ == "__main__":